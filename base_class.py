@@ -3,6 +3,7 @@ import abc
 
 class BaseClub(abc.ABC):
     """抽象基类; 用于定义俱乐部类型"""
+    __slots__ = ()
 
     @property
     @abc.abstractmethod
@@ -47,6 +48,7 @@ class BaseClub(abc.ABC):
 
 class BasePlayer(abc.ABC):
     """抽象基类; 用于定义球员类型"""
+    __slots__ = ()
 
     @property
     @abc.abstractmethod
@@ -116,6 +118,7 @@ class BasePlayer(abc.ABC):
 
 class BaseCoach(abc.ABC):
     """抽象基类; 用于定义教练类型"""
+    __slots__ = ()
 
     @property
     @abc.abstractmethod
@@ -0,0 +1,101 @@
+import base_class
+from character import PlayersAttr, CoachAttr
+from club import ClubAttr
+from schema import AttrSchema
+
+_SCHEMAS = (
+    (base_class.BasePlayer, AttrSchema.of(PlayersAttr)),
+    (base_class.BaseCoach, AttrSchema.of(CoachAttr)),
+    (base_class.BaseClub, AttrSchema.of(ClubAttr)),
+)
+
+
+def schema_of(entity) -> AttrSchema:
+    """返回球员/教练/俱乐部对象对应的属性结构"""
+    for base, schema in _SCHEMAS:
+        if isinstance(entity, base):
+            return schema
+    raise ValueError(f"{entity.__class__.__name__} object is not a Players, Coach or Club")
+
+
+def bulk_modify(updates) -> int:
+    """批量修改属性; updates为[(对象, 属性名, 新值), ...], 对象可以是球员、教练或俱乐部
+
+    先校验全部修改(任何一项不合法时抛出ValueError且不做任何修改), 再一次遍历完成修改;
+    球员的修改通知(如俱乐部身价统计)在全部修改完成后, 对每个通知对象只发送一次players_batch_modified
+
+    Used:
+        bulk_modify([(p, PlayersAttr.AGE, p.age + 1) for p in players])
+        bulk_modify([(club, ClubAttr.CITY, "曼彻斯特"), (coach, CoachAttr.AGE, "65")])
+    :return: 修改的数量
+    """
+    updates = list(updates)
+    # 校验结果按(类型, 属性名)缓存, 同一列的修改只校验一次
+    checked = set()
+    for entity, by, _ in updates:
+        key = (entity.__class__, by)
+        if key in checked:
+            continue
+        if not callable(getattr(entity, "_modify", None)):
+            raise ValueError(f"{entity.__class__.__name__} object does not support modify")
+        schema_of(entity).validate(entity, by)
+        checked.add(key)
+
+    notify = dict()
+    for entity, by, value in updates:
+        old = entity._modify(by, value)
+        watching = getattr(entity, "_watching", None)
+        if watching is None:
+            continue
+        for watcher in watching():
+            changes = notify.get(watcher)
+            if changes is None:
+                changes = notify[watcher] = list()
+            changes.append((entity, by, old, value))
+
+    for watcher, changes in notify.items():
+        batch = getattr(watcher, "players_batch_modified", None)
+        if batch is not None:
+            batch(changes)
+            continue
+        for entity, by, old, value in changes:
+            watcher.players_modified(entity, by, old, value)
+    return len(updates)
+
+
+def bulk_modify_column(entities, by, values) -> int:
+    """按列批量修改: 将entities[i]的by属性修改为values[i]; 长度不一致时抛出ValueError
+
+    Used:
+        bulk_modify_column(players, PlayersAttr.WORTH, new_worths)
+    :return: 修改的数量
+    """
+    entities, values = list(entities), list(values)
+    if len(entities) != len(values):
+        raise ValueError(f"got {len(entities)} entities but {len(values)} values")
+    return bulk_modify(zip(entities, [by] * len(entities), values))
+
+
+if __name__ == '__main__':
+    import timeit
+    import character
+    import club
+    from basedata import PLAYERS_DATABASE
+
+    players = [character.Players(f"{name}#{i}", **attrs)
+               for i in range(50) for name, attrs in PLAYERS_DATABASE.items()]
+    clubs = [club.Club(f"club#{i}", players=players[i::100]) for i in range(100)]
+    worths = [f"{i % 9000 + 100}万英镑" for i in range(len(players))]
+
+    def one_by_one():
+        for p, worth in zip(players, worths):
+            p.modify(PlayersAttr.AGE, p.age)
+            p.modify(PlayersAttr.WORTH, worth)
+
+    def batched():
+        bulk_modify_column(players, PlayersAttr.AGE, [p.age for p in players])
+        bulk_modify_column(players, PlayersAttr.WORTH, worths)
+
+    for label, func in (("modify", one_by_one), ("bulk_modify", batched)):
+        seconds = min(timeit.repeat(func, number=3, repeat=3)) / 3
+        print(f"{label:<12}{seconds * 1000:8.1f} ms for {len(players)} players in {len(clubs)} clubs")
@@ -1,5 +1,13 @@
-from copy import copy
+import weakref
+import datetime
 import base_class
+import parsers
+import vocab
+from schema import AttrSchema, copy_description, fingerprint
+
+_UNSET = object()
+# 每个对象缓存的as-of日期数量; 超出后清空重新缓存
+_AGES_CACHE_SIZE = 64
 
 
 class PlayersAttr(object):
@@ -34,6 +42,10 @@ class CoachAttr(object):
     BIRTHDAY = "birthday"
 
 
+_PLAYERS_SCHEMA = AttrSchema.of(PlayersAttr)
+_COACH_SCHEMA = AttrSchema.of(CoachAttr)
+
+
 class Players(base_class.BasePlayer):
     """ 球员类
 
@@ -64,6 +76,8 @@ class Players(base_class.BasePlayer):
         p.modify(by=PlayersAttr.AGE, value="37")
         # 与另一个球员对象比较是否一致
         p == Players('ch_name', 'en_name', **kwargs)
+        # 解析后的身价及换算
+        p.valuation.amount, p.worth_in("欧元")
     """
 
     def __init__(self, ch_name: str, en_name='', **kwargs):
@@ -74,7 +88,36 @@ class Players(base_class.BasePlayer):
         """
         self.__ch_name = ch_name
         self.__en_name = en_name
-        self.__descript = kwargs.copy()
+        self.__descript = vocab.intern_attrs(kwargs)
+        self.__description = None
+        self.__view = None
+        self.__hash = None
+        self.__fingerprint = None
+        self.__valuation = _UNSET
+        self.__ages = None
+        self.__watchers = None
+
+    def __copy__(self):
+        """浅拷贝; 拷贝拥有独立的属性字典, 不继承修改通知
+        (属性字典可能包含modify写入的ch_name/en_name, 不能作为关键字参数传入构造函数)"""
+        clone = self.__class__(self.__ch_name, self.__en_name)
+        clone.__descript = self.__descript.copy()
+        return clone
+
+    def __getstate__(self):
+        """pickle时不保存修改通知(弱引用)及派生缓存; 哈希与指纹基于进程内加盐的hash(), 加载后重新计算"""
+        state = self.__dict__.copy()
+        state.update({
+            "_Players__description": None, "_Players__view": None,
+            "_Players__valuation": _UNSET, "_Players__watchers": None,
+            "_Players__hash": None, "_Players__fingerprint": None,
+        })
+        return state
+
+    def __setstate__(self, state):
+        """_UNSET经pickle后不再是同一个对象, 加载后重新置为未解析"""
+        self.__dict__.update(state)
+        self.__valuation = _UNSET
 
     def __str__(self):
         return (f"{self.__class__.__name__}({self.__ch_name},"
@@ -94,11 +137,28 @@ class Players(base_class.BasePlayer):
         return bool(self.__ch_name)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, self.__class__):
             return False
-        if self.__descript != other.__descript:
+        if self.__ch_name != other.__ch_name or self.__en_name != other.__en_name:
             return False
-        return self.__ch_name == other.__ch_name and self.__en_name == other.__en_name
+        return self.__descript == other.__descript
+
+    def __hash__(self):
+        """以(中文名, 英文名)为身份计算哈希并缓存; 相等的对象哈希一定相同"""
+        if self.__hash is None:
+            self.__hash = hash((self.__ch_name, self.__en_name))
+        return self.__hash
+
+    @property
+    def fingerprint(self) -> int:
+        """返回全部属性内容的指纹, 用于按内容去重或比较差异; 在modify之前缓存
+        直接修改honour/ability等嵌套字典不会刷新指纹, 应通过modify修改
+        指纹基于hash(), 字符串哈希在每个进程中加盐不同, 只在同一进程内稳定, 不能持久化或跨进程比较"""
+        if self.__fingerprint is None:
+            self.__fingerprint = fingerprint(self.__descript, self.__ch_name, self.__en_name)
+        return self.__fingerprint
 
     @property
     def honour(self) -> dict:
@@ -130,6 +190,23 @@ class Players(base_class.BasePlayer):
         """返回球员身价; 万欧"""
         return self.__descript.get(PlayersAttr.WORTH, str())
 
+    @property
+    def valuation(self):
+        """返回解析后的身价parsers.Valuation; 无法解析时返回None
+        解析结果会被缓存, 直到通过modify修改身价"""
+        if self.__valuation is _UNSET:
+            self.__valuation = parsers.parse_valuation(self.worth)
+        return self.__valuation
+
+    def worth_in(self, currency=parsers.BASE_CURRENCY, rates=None):
+        """返回换算为指定货币的身价数值; 无法解析时返回None
+
+        :param currency: 目标货币
+        :param rates: 自定义汇率, 默认使用parsers.RATES
+        """
+        valuation = self.valuation
+        return None if valuation is None else valuation.to(currency, rates)
+
     @property
     def preferred_foot(self) -> str:
         """返回球员惯用脚; [左脚, 右脚, 左右脚]"""
@@ -165,24 +242,90 @@ class Players(base_class.BasePlayer):
         """返回球员年龄"""
         return self.__descript.get(PlayersAttr.AGE, int())
 
+    def age_on(self, as_of=None):
+        """返回球员在as_of当天的周岁, 根据出生日期计算; 出生日期无法解析时返回None
+
+        :param as_of: datetime.date/datetime或"YYYY-MM-DD"字符串, 默认今天
+        结果按日期缓存, 直到通过modify修改出生日期; 赛季模拟中逐轮查询不会重复解析出生日期
+        """
+        if self.__ages is None:
+            self.__ages = dict()
+        return _cached_age(self.__ages, self.birthday, as_of)
+
+    def watch(self, watcher):
+        """注册修改通知; 每次modify后调用watcher.players_modified(players, by, old, new)
+        watcher以弱引用保存"""
+        if self.__watchers is None:
+            self.__watchers = weakref.WeakSet()
+        self.__watchers.add(watcher)
+
+    def unwatch(self, watcher):
+        """取消修改通知"""
+        if self.__watchers is not None:
+            self.__watchers.discard(watcher)
+
     def modify(self, by=PlayersAttr.CH_NAME, value=None):
         """根据传入的属性名称来修改对应的属性值"""
-        if by not in PlayersAttr.__dict__.values():
-            raise ValueError(
-                f"{self.__class__.__name__} object not attribute: '{by}'"
-            )
-        self.__descript[by] = value
+        _PLAYERS_SCHEMA.validate(self, by)
+        old = self._modify(by, value)
+        if self.__watchers:
+            for watcher in list(self.__watchers):
+                watcher.players_modified(self, by, old, value)
+
+    def _modify(self, by, value):
+        """修改属性值但不校验属性名、不发送修改通知; 返回旧值. 供bulk批量修改使用"""
+        old = self.__descript.get(by)
+        self.__descript[by] = vocab.intern_field(by, value)
+        self.__description = None
+        self.__view = None
+        self.__fingerprint = None
+        if by == PlayersAttr.WORTH:
+            self.__valuation = _UNSET
+        elif by == PlayersAttr.BIRTHDAY:
+            self.__ages = None
+        return old
+
+    def _watching(self) -> list:
+        """返回当前注册的修改通知对象"""
+        return list(self.__watchers) if self.__watchers else list()
 
     def description(self) -> dict:
-        """返回球员的所有属性信息"""
-        desc = dict()
-        attributes = [value for key, value in PlayersAttr.__dict__.items()
-                      if isinstance(key, str) and key.isupper()]
-        for name in attributes:
-            desc[name] = copy(self.__descript.get(name))
-        desc["ch_name"] = self.__ch_name
-        desc["en_name"] = self.__en_name
-        return desc
+        """返回球员的所有属性信息; 属性字典在modify之前被缓存, 每次返回其副本"""
+        if self.__description is None:
+            self.__description = _PLAYERS_SCHEMA.snapshot(
+                self.__descript, ch_name=self.__ch_name, en_name=self.__en_name
+            )
+        return copy_description(self.__description)
+
+    def view(self):
+        """返回球员所有属性的只读视图(types.MappingProxyType); 不复制任何属性值,
+        嵌套的honour等字典同样为只读视图. 视图在modify之前被缓存; 需要可修改的副本时使用description()"""
+        if self.__view is None:
+            self.__view = _PLAYERS_SCHEMA.view(self.__descript, ch_name=self.__ch_name, en_name=self.__en_name)
+        return self.__view
+
+    def _state(self) -> tuple:
+        """返回(名称, 属性字典)且不复制; 供codec编码使用"""
+        return (self.__ch_name, self.__en_name), self.__descript
+
+    def to_bytes(self) -> bytes:
+        """编码为紧凑的二进制; 见codec.dumps"""
+        import codec
+        return codec.dumps(self)
+
+    @classmethod
+    def _from_state(cls, names, values):
+        """根据_state()的结果构建, 直接使用values作为属性字典; 供codec解码使用
+        (marshal解码时会恢复字符串的驻留状态, 不需要再次驻留)"""
+        entity = cls(*names)
+        entity.__descript = values
+        return entity
+
+    @classmethod
+    def from_bytes(cls, data):
+        """解码to_bytes()的结果; 与原对象相等"""
+        import codec
+        return codec.loads_as(cls, data)
 
 
 class Coach(base_class.BaseCoach):
@@ -210,7 +353,18 @@ class Coach(base_class.BaseCoach):
         """
         self.__ch_name = ch_name
         self.__en_name = en_name
-        self.__descript = kwargs.copy()
+        self.__descript = vocab.intern_attrs(kwargs)
+        self.__description = None
+        self.__view = None
+        self.__hash = None
+        self.__fingerprint = None
+        self.__ages = None
+
+    def __getstate__(self):
+        """pickle时不保存只读视图缓存; 哈希与指纹基于进程内加盐的hash(), 加载后重新计算"""
+        state = self.__dict__.copy()
+        state.update({"_Coach__view": None, "_Coach__hash": None, "_Coach__fingerprint": None})
+        return state
 
     def __str__(self):
         return (f"{self.__class__.__name__}({self.__ch_name},"
@@ -230,11 +384,28 @@ class Coach(base_class.BaseCoach):
         return bool(self.__ch_name)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, self.__class__):
             return False
-        if self.__descript != other.__descript:
+        if self.__ch_name != other.__ch_name or self.__en_name != other.__en_name:
             return False
-        return self.__ch_name == other.__ch_name and self.__en_name == other.__en_name
+        return self.__descript == other.__descript
+
+    def __hash__(self):
+        """以(中文名, 英文名)为身份计算哈希并缓存; 相等的对象哈希一定相同"""
+        if self.__hash is None:
+            self.__hash = hash((self.__ch_name, self.__en_name))
+        return self.__hash
+
+    @property
+    def fingerprint(self) -> int:
+        """返回全部属性内容的指纹, 用于按内容去重或比较差异; 在modify之前缓存
+        直接修改honour/ability等嵌套字典不会刷新指纹, 应通过modify修改
+        指纹基于hash(), 字符串哈希在每个进程中加盐不同, 只在同一进程内稳定, 不能持久化或跨进程比较"""
+        if self.__fingerprint is None:
+            self.__fingerprint = fingerprint(self.__descript, self.__ch_name, self.__en_name)
+        return self.__fingerprint
 
     @property
     def ch_name(self) -> str:
@@ -256,6 +427,12 @@ class Coach(base_class.BaseCoach):
         """返回教练出生日期"""
         return self.__descript.get(CoachAttr.BIRTHDAY, str())
 
+    def age_on(self, as_of=None):
+        """返回教练在as_of当天的周岁; 见Players.age_on"""
+        if self.__ages is None:
+            self.__ages = dict()
+        return _cached_age(self.__ages, self.birthday, as_of)
+
     @property
     def height(self) -> str:
         """返回教练身高"""
@@ -283,19 +460,76 @@ class Coach(base_class.BaseCoach):
 
     def modify(self, by=CoachAttr.CH_NAME, value=None):
         """根据传入的属性名称来修改对应的属性值"""
-        if by not in CoachAttr.__dict__.values():
-            raise ValueError(
-                f"{self.__class__.__name__} object not attribute: '{by}'"
-            )
-        self.__descript[by] = value
+        _COACH_SCHEMA.validate(self, by)
+        self._modify(by, value)
+
+    def _modify(self, by, value):
+        """修改属性值但不校验属性名; 返回旧值. 供bulk批量修改使用"""
+        old = self.__descript.get(by)
+        self.__descript[by] = vocab.intern_field(by, value)
+        self.__description = None
+        self.__view = None
+        self.__fingerprint = None
+        if by == CoachAttr.BIRTHDAY:
+            self.__ages = None
+        return old
 
     def description(self) -> dict:
-        """返回教练的所有属性信息"""
-        desc = dict()
-        attributes = [value for key, value in CoachAttr.__dict__.items()
-                      if isinstance(key, str) and key.isupper()]
-        for name in attributes:
-            desc[name] = copy(self.__descript.get(name))
-        desc["ch_name"] = self.__ch_name
-        desc["en_name"] = self.__en_name
-        return desc
+        """返回教练的所有属性信息; 属性字典在modify之前被缓存, 每次返回其副本"""
+        if self.__description is None:
+            self.__description = _COACH_SCHEMA.snapshot(
+                self.__descript, ch_name=self.__ch_name, en_name=self.__en_name
+            )
+        return copy_description(self.__description)
+
+    def view(self):
+        """返回教练所有属性的只读视图(types.MappingProxyType); 不复制任何属性值,
+        嵌套的honour等字典同样为只读视图. 视图在modify之前被缓存; 需要可修改的副本时使用description()"""
+        if self.__view is None:
+            self.__view = _COACH_SCHEMA.view(self.__descript, ch_name=self.__ch_name, en_name=self.__en_name)
+        return self.__view
+
+    def _state(self) -> tuple:
+        """返回(名称, 属性字典)且不复制; 供codec编码使用"""
+        return (self.__ch_name, self.__en_name), self.__descript
+
+    def to_bytes(self) -> bytes:
+        """编码为紧凑的二进制; 见codec.dumps"""
+        import codec
+        return codec.dumps(self)
+
+    @classmethod
+    def _from_state(cls, names, values):
+        """根据_state()的结果构建, 直接使用values作为属性字典; 供codec解码使用
+        (marshal解码时会恢复字符串的驻留状态, 不需要再次驻留)"""
+        entity = cls(*names)
+        entity.__descript = values
+        return entity
+
+    @classmethod
+    def from_bytes(cls, data):
+        """解码to_bytes()的结果; 与原对象相等"""
+        import codec
+        return codec.loads_as(cls, data)
+
+
+def as_of_date(value=None) -> datetime.date:
+    """将as-of参数转换为datetime.date; None表示今天, 无法解析时抛出ValueError"""
+    if value is None:
+        return datetime.date.today()
+    as_of = parsers.parse_date(value)
+    if as_of is None:
+        raise ValueError(f"invalid as-of date: {value!r}")
+    return as_of
+
+
+def _cached_age(ages: dict, birthday, as_of):
+    as_of = as_of_date(as_of)
+    age = ages.get(as_of, _UNSET)
+    if age is _UNSET:
+        born = parsers.parse_date(birthday)
+        age = None if born is None else parsers.age_on(born, as_of)
+        if len(ages) >= _AGES_CACHE_SIZE:
+            ages.clear()
+        ages[as_of] = age
+    return age
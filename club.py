@@ -1,7 +1,11 @@
-import random
-from copy import copy
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
 import base_class
 import character
+import lineup
+import parsers
+import vocab
+from schema import AttrSchema, copy_description, freeze
 
 
 class ClubAttr(object):
@@ -17,6 +21,169 @@ class ClubAttr(object):
     LEAGUE_MATCHES = "league_matches"
 
 
+_CLUB_SCHEMA = AttrSchema.of(ClubAttr)
+_PLAYERS_SCHEMA = AttrSchema.of(character.PlayersAttr)
+
+# 批量增减球员的结果; players为实际加入/移除的球员, skipped为未处理的球员
+RosterChange = namedtuple("RosterChange", ["players", "skipped"])
+
+
+class WorthStats(object):
+    """俱乐部球员身价统计; 数值均已换算为parsers.BASE_CURRENCY, 身价无法解析或汇率未配置的球员不计入
+    由Club在增减球员及球员修改身价时增量维护"""
+
+    def __init__(self, players=()):
+        self.total = 0.0
+        self.__values = list()
+        for players_ in players:
+            self.add(_worth_of(players_))
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(count={self.count}, total={self.total}, "
+                f"mean={self.mean}, max={self.max})")
+
+    @property
+    def count(self) -> int:
+        """返回计入统计的球员人数"""
+        return len(self.__values)
+
+    @property
+    def mean(self) -> float:
+        """返回平均身价; 没有球员时返回0"""
+        return self.total / len(self.__values) if self.__values else 0.0
+
+    @property
+    def max(self) -> float:
+        """返回最高身价; 没有球员时返回0"""
+        return self.__values[-1] if self.__values else 0.0
+
+    def add(self, value):
+        if value is None:
+            return
+        insort(self.__values, value)
+        self.total += value
+
+    def discard(self, value):
+        if value is None:
+            return
+        position = bisect_left(self.__values, value)
+        if position < len(self.__values) and self.__values[position] == value:
+            del self.__values[position]
+            self.total -= value
+
+    def replace(self, removed, added):
+        """批量修改: 移除removed中的数值并加入added中的数值(None忽略); 只遍历一次, 用一次sorted()重建"""
+        removed = Counter(value for value in removed if value is not None)
+        added = [value for value in added if value is not None]
+        kept = list()
+        for value in self.__values:
+            if removed[value] > 0:
+                removed[value] -= 1
+                self.total -= value
+            else:
+                kept.append(value)
+        self.total += sum(added)
+        self.__values = sorted(kept + added)
+
+
+class RosterIndex(object):
+    """俱乐部球员的哈希索引; {属性: {属性值: 球员}}, 同一属性值的球员保持在阵容中的顺序
+    由Club在增减球员及球员modify时维护; club.players为只读视图, 阵容只能经由Club的方法修改"""
+    ATTRIBUTES = (
+        character.PlayersAttr.CH_NAME, character.PlayersAttr.EN_NAME, character.PlayersAttr.NUMBER,
+        character.PlayersAttr.LOCATION, character.PlayersAttr.NATIONALITY,
+    )
+
+    def __init__(self, players=()):
+        self.__buckets = {name: dict() for name in self.ATTRIBUTES}
+        # id(球员) -> [球员, 各属性的索引值, 每次加入的序号]; 同一对象可能在阵容中出现多次
+        self.__entries = dict()
+        self.__sequence = 0
+        for players_ in players:
+            self.add(players_)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, name):
+        return name in self.__buckets
+
+    def add(self, players):
+        entry = self.__entries.get(id(players))
+        self.__sequence += 1
+        if entry is not None:
+            entry[2].append(self.__sequence)
+            return
+        keys = tuple(getattr(players, name) for name in self.ATTRIBUTES)
+        self.__entries[id(players)] = [players, keys, [self.__sequence]]
+        for name, key in zip(self.ATTRIBUTES, keys):
+            self.__buckets[name].setdefault(key, dict())[id(players)] = players
+
+    def has(self, players) -> bool:
+        """球员对象是否在阵容中(按对象身份判断)"""
+        return id(players) in self.__entries
+
+    def occurrences(self, players) -> int:
+        """返回球员对象在阵容中出现的次数"""
+        entry = self.__entries.get(id(players))
+        return 0 if entry is None else len(entry[2])
+
+    def discard(self, players, every=False):
+        """移除球员在阵容中的第一次出现(与list.remove一致); every为True时移除全部出现"""
+        entry = self.__entries.get(id(players))
+        if entry is None:
+            return
+        del entry[2][:None if every else 1]
+        if entry[2]:
+            # 球员在阵容中的位置变为下一次出现的位置
+            for name, key in zip(self.ATTRIBUTES, entry[1]):
+                self.__sort(self.__buckets[name][key])
+            return
+        del self.__entries[id(players)]
+        for name, key in zip(self.ATTRIBUTES, entry[1]):
+            bucket = self.__buckets[name][key]
+            del bucket[id(players)]
+            if not bucket:
+                del self.__buckets[name][key]
+
+    def update(self, players):
+        """球员属性修改后重新计算其索引值"""
+        entry = self.__entries.get(id(players))
+        if entry is None:
+            return
+        keys = tuple(getattr(players, name) for name in self.ATTRIBUTES)
+        for name, old, new in zip(self.ATTRIBUTES, entry[1], keys):
+            if old == new:
+                continue
+            bucket = self.__buckets[name][old]
+            del bucket[id(players)]
+            if not bucket:
+                del self.__buckets[name][old]
+            bucket = self.__buckets[name].setdefault(new, dict())
+            in_order = not bucket or self.__position(next(reversed(bucket.values()))) < entry[2][0]
+            bucket[id(players)] = players
+            if not in_order:
+                self.__sort(bucket)
+        entry[1] = keys
+
+    def first(self, name, value):
+        """返回属性值为value的第一个球员; 不存在时返回None"""
+        bucket = self.__buckets[name].get(value)
+        return next(iter(bucket.values())) if bucket else None
+
+    def get(self, name, value) -> list:
+        """返回属性值为value的所有球员"""
+        return list(self.__buckets[name].get(value, dict()).values())
+
+    def __position(self, players):
+        return self.__entries[id(players)][2][0]
+
+    def __sort(self, bucket):
+        ordered = sorted(bucket.values(), key=self.__position)
+        bucket.clear()
+        bucket.update((id(p), p) for p in ordered)
+
+
 class Club(base_class.BaseClub):
     """ 俱乐部类
 
@@ -36,6 +203,13 @@ class Club(base_class.BaseClub):
         club.add_players(Players("杰登·桑乔", location="中场"))
         # 移除球员
         club.remove_players(by=PlayersAttr.CH_NAME, value="杰登·桑乔")
+        # 查询球员; ch_name/en_name/number/location/nationality使用哈希索引
+        club.query_players(by=PlayersAttr.NUMBER, value="7")
+        club.query_all_players(by=PlayersAttr.LOCATION, value="中场")
+        # 多条件查询; 见query.Predicate
+        club.select((Attr(PlayersAttr.LOCATION) == "中场") & Attr(PlayersAttr.AGE).between(20, 28))
+        # 球员身价统计; 随add_players/remove_players/modify及球员修改身价增量更新
+        club.worth_stats.total, club.worth_stats.mean, club.worth_stats.max
     """
 
     def __init__(self, name: str, **kwargs):
@@ -44,16 +218,39 @@ class Club(base_class.BaseClub):
         :param kwargs: 俱乐部属性集合
         """
         self.__name = name
-        self.__descript = kwargs.copy()
+        self.__descript = vocab.intern_attrs(kwargs)
+        self.__description = None
+        self.__view = None
+        self.__worth_stats = WorthStats()
+        # id(球员) -> 计入身价统计的数值; 修改身价时据此移除旧值, 不再解析旧的身价字符串
+        self.__worths = dict()
+        self.__index = RosterIndex()
+        self.__buckets = lineup.PositionBuckets()
+        self._track_players(self.__descript.get(ClubAttr.PLAYERS))
+
+    def __getstate__(self):
+        """pickle时不保存只读视图缓存"""
+        state = self.__dict__.copy()
+        state["_Club__view"] = None
+        return state
+
+    def __setstate__(self, state):
+        """pickle恢复后重新注册球员修改通知并重建索引(索引以对象id为键)"""
+        self.__dict__.update(state)
+        self.__worths = {id(players): _worth_of(players) for players in _as_list(self.players)}
+        self.__index = RosterIndex(_as_list(self.players))
+        self.__buckets = lineup.PositionBuckets(_as_list(self.players))
+        for players in _as_list(self.players):
+            players.watch(self)
 
     def __str__(self):
         return "<{}({}), {}>".format(
-            self.__class__.__name__, self.__name, self.players
+            self.__class__.__name__, self.__name, self.__descript.get(ClubAttr.PLAYERS)
         )
 
     def __repr__(self):
         return "<{}({}), {}>".format(
-            self.__class__.__name__, self.__name, self.players
+            self.__class__.__name__, self.__name, self.__descript.get(ClubAttr.PLAYERS)
         )
 
     def __iter__(self):
@@ -68,12 +265,7 @@ class Club(base_class.BaseClub):
     @property
     def locations(self):
         """返回球员各个位置的精确名称"""
-        return {
-            "后卫": ['左后卫', '后卫', '右后卫'],
-            "中场": ['中场', '前腰', '中卫', '后腰', '中前卫'],
-            "前锋": ['前锋', '中锋', '左边锋', '右边锋'],
-            "守门员": ['守门员']
-        }
+        return {group: list(locations) for group, locations in lineup.GROUPS.items()}
 
     @property
     def name(self) -> str:
@@ -111,62 +303,257 @@ class Club(base_class.BaseClub):
         return self.__descript.get(ClubAttr.COACH, character.Coach('', ''))
 
     @property
-    def players(self) -> list:
-        """返回俱乐部目前有所的球员"""
-        return self.__descript.get(ClubAttr.PLAYERS, list())
+    def players(self):
+        """返回俱乐部目前有所的球员; 阵容列表的只读视图(schema.SequenceView), 增减球员使用add_players/remove_players等方法
+        (直接修改列表会使身价统计、索引与位置分组失去同步)"""
+        return freeze(self.__descript.get(ClubAttr.PLAYERS, list()))
+
+    @property
+    def worth_stats(self) -> WorthStats:
+        """返回球员身价统计(总和/平均/最高)"""
+        return self.__worth_stats
 
     def modify(self, by=ClubAttr.NAME, value=None):
         """根据传入的属性名称来修改对应的属性值"""
-        if by not in ClubAttr.__dict__.values():
-            raise ValueError(
-                f"{self.__class__.__name__} object not attribute: '{by}'"
-            )
-        self.__descript[by] = value
+        _CLUB_SCHEMA.validate(self, by)
+        self._modify(by, value)
+
+    def _modify(self, by, value):
+        """修改属性值但不校验属性名; 返回旧值. 供bulk批量修改使用"""
+        old = self.__descript.get(by)
+        if by == ClubAttr.PLAYERS:
+            self._untrack_players(old, roster=_as_list(value))
+        self.__descript[by] = vocab.intern_field(by, value)
+        self.__description = None
+        self.__view = None
+        if by == ClubAttr.PLAYERS:
+            self.__worth_stats = WorthStats()
+            self.__worths = dict()
+            self.__index = RosterIndex()
+            self.__buckets = lineup.PositionBuckets()
+            self._track_players(value)
+        return old
+
+    def players_modified(self, players, by, old, new):
+        """球员modify后的通知; 见character.Players.watch"""
+        if by == character.PlayersAttr.WORTH:
+            # 同一球员在阵容中出现多次时每次出现都计入统计(与_track_players一致)
+            old, new = self.__worths.get(id(players)), _worth_of(players)
+            self.__worths[id(players)] = new
+            for _ in range(self.__index.occurrences(players)):
+                self.__worth_stats.discard(old)
+                self.__worth_stats.add(new)
+        elif by in self.__index:
+            self.__index.update(players)
+            self.__buckets.update(players)
+
+    def players_batch_modified(self, changes: list):
+        """批量修改结束后的通知, changes为[(players, by, old, new), ...]
+        身价: 每名球员只按最终身价计算一次, 全部变化一次性应用到统计(只排序一次)"""
+        worth_changed, updated = dict(), set()
+        for players, by, _, _ in changes:
+            if by == character.PlayersAttr.WORTH:
+                worth_changed[id(players)] = players
+            elif by in self.__index and id(players) not in updated:
+                updated.add(id(players))
+                self.__index.update(players)
+                self.__buckets.update(players)
+        if not worth_changed:
+            return
+        removed, added = list(), list()
+        for key, players in worth_changed.items():
+            count = self.__index.occurrences(players)
+            new = _worth_of(players)
+            removed.extend([self.__worths.get(key)] * count)
+            added.extend([new] * count)
+            self.__worths[key] = new
+        self.__worth_stats.replace(removed, added)
+
+    def _track_players(self, players):
+        if isinstance(players, base_class.BasePlayer):
+            players = [players]
+        players = list(players or ())
+        worths = [_worth_of(players_) for players_ in players]
+        for players_, worth in zip(players, worths):
+            players_.watch(self)
+            self.__worth_stats.add(worth)
+            self.__worths[id(players_)] = worth
+            self.__index.add(players_)
+            self.__buckets.add(players_)
+
+    def _untrack_players(self, players, roster=None):
+        """停止跟踪players; 只有不在roster(默认为当前阵容)中的球员才取消修改通知"""
+        if isinstance(players, base_class.BasePlayer):
+            players = [players]
+        roster = self.players if roster is None else roster
+        for players_ in players or ():
+            if not any(p is players_ for p in roster):
+                players_.unwatch(self)
+            self.__worth_stats.discard(self.__worths.get(id(players_)))
+            self.__index.discard(players_)
+            self.__buckets.discard(players_)
+            if not self.__index.has(players_):
+                self.__worths.pop(id(players_), None)
 
     def description(self) -> dict:
-        """返回俱乐部的所有属性信息"""
-        desc = dict()
-        attributes = [value for key, value in ClubAttr.__dict__.items()
-                      if isinstance(key, str) and key.isupper()]
-        for name in attributes:
-            desc[name] = copy(self.__descript.get(name))
-        desc["name"] = self.__name
-        return desc
+        """返回俱乐部的所有属性信息; 属性字典在modify之前被缓存, 每次返回其副本"""
+        if self.__description is None:
+            self.__description = _CLUB_SCHEMA.snapshot(self.__descript, name=self.__name)
+        return copy_description(self.__description)
+
+    def view(self):
+        """返回俱乐部所有属性的只读视图(types.MappingProxyType); 不复制任何属性值,
+        players为球员列表的只读序列视图. 视图在modify之前被缓存; 需要可修改的副本时使用description()"""
+        if self.__view is None:
+            self.__view = _CLUB_SCHEMA.view(self.__descript, name=self.__name)
+        return self.__view
+
+    def _state(self) -> tuple:
+        """返回(名称, 属性字典)且不复制; 供codec编码使用"""
+        return (self.__name,), self.__descript
+
+    def to_bytes(self) -> bytes:
+        """编码为紧凑的二进制; 教练与球员一并编码, 字符串在整个俱乐部内只保存一次. 见codec.dumps"""
+        import codec
+        return codec.dumps(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """解码to_bytes()的结果; 球员与教练解码为character.Players/Coach"""
+        import codec
+        return codec.loads_as(cls, data)
 
     def add_players(self, players: character.Players):
-        """增加单个球员; 球员类型必须为Players"""
-        if not isinstance(players, character.Players):
+        """增加单个球员; 球员类型必须为Players(或其他BasePlayer实现, 如compact.CompactPlayers)"""
+        if not isinstance(players, base_class.BasePlayer):
             raise ValueError(f"Parameter is not of type Players")
-        self.__descript.get(ClubAttr.PLAYERS, list()).append(players)
+        self._track_players(players)
+        self._roster().append(players)
+
+    def add_many_players(self, players) -> RosterChange:
+        """批量增加球员; 先校验整批球员的类型(任何一个不是BasePlayer时抛出ValueError且不做任何修改),
+        再一次性加入阵容. 已在阵容中的球员对象及本批中重复出现的对象被跳过
+
+        Used:
+            added, skipped = club.add_many_players(new_signings)
+        :return: RosterChange(players=加入的球员, skipped=跳过的球员)
+        """
+        players = list(players)
+        for players_ in players:
+            if not isinstance(players_, base_class.BasePlayer):
+                raise ValueError(f"Parameter is not of type Players: {players_!r}")
+        added, skipped, seen = list(), list(), set()
+        for players_ in players:
+            if id(players_) in seen or self.__index.has(players_):
+                skipped.append(players_)
+                continue
+            seen.add(id(players_))
+            added.append(players_)
+        self._track_players(added)
+        self._roster().extend(added)
+        return RosterChange(added, skipped)
+
+    def remove_many_players(self, players=(), where=None) -> RosterChange:
+        """批量移除球员; 移除players中的球员(按对象身份匹配)以及满足where(query.Predicate)的球员,
+        同一球员对象在阵容中出现多次时全部移除. 阵容只遍历一次
+
+        Used:
+            removed, missing = club.remove_many_players(departures)
+            club.remove_many_players(where=Attr(PlayersAttr.AGE) >= 35)
+        :return: RosterChange(players=移除的球员, 按阵容顺序; skipped=players中不在阵容里的球员)
+        """
+        players = list(players)
+        for players_ in players:
+            if not isinstance(players_, base_class.BasePlayer):
+                raise ValueError(f"Parameter is not of type Players: {players_!r}")
+        wanted = {id(players_) for players_ in players}
+        match = None if where is None else where.compile()
+        roster = self._roster()
+        kept, removed = list(), dict()
+        for players_ in roster:
+            if id(players_) in wanted or (match is not None and match(players_)):
+                removed.setdefault(id(players_), [players_, 0])[1] += 1
+            else:
+                kept.append(players_)
+        if removed:
+            roster[:] = kept
+            for players_, count in removed.values():
+                players_.unwatch(self)
+                self.__index.discard(players_, every=True)
+                self.__buckets.discard(players_, every=True)
+                worth = self.__worths.pop(id(players_), None)
+                for _ in range(count):
+                    self.__worth_stats.discard(worth)
+        return RosterChange([players_ for players_, _ in removed.values()],
+                            [players_ for players_ in players if id(players_) not in removed])
+
+    def _roster(self) -> list:
+        """返回阵容列表; 没有球员或只有单个球员对象时转换为列表"""
+        roster = self.__descript.get(ClubAttr.PLAYERS)
+        if isinstance(roster, list):
+            return roster
+        self.__descript[ClubAttr.PLAYERS] = roster = list(_as_list(roster))
+        self.__description = None
+        self.__view = None
+        return roster
 
     def remove_players(self, by=character.PlayersAttr.CH_NAME, value=None):
         """移除单个球员; 根据球员的某一个属性进行判断,移除第一个匹配到的球员"""
-        self_players = self.__descript.get(ClubAttr.PLAYERS)
-        if not self_players:
+        players = self.query_players(by=by, value=value)
+        if players is None:
             return False
-        if isinstance(self_players, character.Players):
-            if eval(f"self_players.{by}") == value:
-                self.__descript[ClubAttr.PLAYERS] = list()
-                return True
-        for players in self.__descript.get(ClubAttr.PLAYERS):
-            if eval(f"players.{by}") == value:
-                self.__descript.get(ClubAttr.PLAYERS).remove(players)
-                return True
-        return False
+        self_players = self.__descript.get(ClubAttr.PLAYERS)
+        if isinstance(self_players, base_class.BasePlayer):
+            self.__descript[ClubAttr.PLAYERS] = list()
+            self.__description = None
+            self.__view = None
+        else:
+            self_players.remove(players)
+        self._untrack_players(players)
+        return True
 
     def query_players(self, by=character.PlayersAttr.CH_NAME, value=None):
-        """查询球员; 根据球员的某一个属性进行判断,返回第一个匹配到的球员"""
-        self_players = self.__descript.get(ClubAttr.PLAYERS)
-        if not self_players:
-            return None
-        if isinstance(self_players, character.Players):
-            if eval(f"self_players.{by}") == value:
-                return self_players
-        for players in self.__descript.get(ClubAttr.PLAYERS):
-            if eval(f"players.{by}") == value:
+        """查询球员; 根据球员的某一个属性进行判断,返回第一个匹配到的球员
+        ch_name/en_name/number/location/nationality通过RosterIndex在O(1)内完成查询, 其他属性逐个比较"""
+        _PLAYERS_SCHEMA.validate(self, by)
+        if by in self.__index:
+            try:
+                return self.__index.first(by, value)
+            except TypeError:
+                return None
+        for players in _as_list(self.__descript.get(ClubAttr.PLAYERS)):
+            if getattr(players, by) == value:
                 return players
-
-    def starting_lineup(self, guard=4, midfield=4, forward=2):
+        return None
+
+    def query_all_players(self, by=character.PlayersAttr.CH_NAME, value=None) -> list:
+        """查询球员; 返回所有匹配的球员, 顺序与加入俱乐部的顺序一致, 同一球员对象只返回一次"""
+        _PLAYERS_SCHEMA.validate(self, by)
+        if by in self.__index:
+            try:
+                return self.__index.get(by, value)
+            except TypeError:
+                return list()
+        matched = dict()
+        for players in _as_list(self.__descript.get(ClubAttr.PLAYERS)):
+            if getattr(players, by) == value:
+                matched.setdefault(id(players), players)
+        return list(matched.values())
+
+    def select(self, predicate):
+        """惰性返回满足predicate(query.Predicate)的所有球员, 顺序与阵容一致, 同一球员对象只返回一次
+        条件中包含索引属性的等值条件(如Attr(PlayersAttr.NUMBER) == "7")时只检查索引中对应的球员"""
+        match = predicate.compile()
+        hint = predicate.hint
+        if hint is not None and hint[0] in self.__index:
+            try:
+                candidates = self.__index.get(*hint)
+            except TypeError:
+                candidates = list()
+            return (players for players in candidates if match(players))
+        return (players for players in _unique(_as_list(self.players)) if match(players))
+
+    def starting_lineup(self, guard=4, midfield=4, forward=2, seed=None):
         """返回11位首发球员; 如果当前俱乐部存的所有球员不足11位则抛出异常
         球员阵型:
             "442": 4 后卫, 4 中场, 2 前锋
@@ -174,20 +561,39 @@ class Club(base_class.BaseClub):
             "433": 4 后卫, 3 中场, 3 前锋
             ...
         如果当前俱乐部球员不够以固定位置安排阵型时,则会随机使用其他位置球员进行占位
+        阵容中为球员对象的引用而不是副本, 需要修改时使用registry.copy_on_write
+        各位置按lineup.PositionBuckets抽样, 不会改变club.players的顺序
         :param guard: 后卫球员人数
         :param midfield: 中场球员人数
         :param forward: 前锋球员人数
+        :param seed: 种子或random.Random实例, 见lineup.make_rng; 相同阵容和种子得到相同的首发,
+                     多场比赛使用lineup.derive_seed(seed, 比赛编号)派生各自的种子
         :return: list
         """
         if sum([guard, midfield, forward]) != 10:
             raise ValueError(
                 "The parameter value is unreasonable. The total number should be 10"
             )
-        if len(self.players) < 11:
+        if len(self.__buckets) < 11:
             raise AttributeError("The current number of players is less than 11")
-        return self._get_starting_lineup(guard, midfield, forward)
+        return self._get_starting_lineup(guard, midfield, forward, lineup.make_rng(seed))
+
+    def optimal_lineup(self, guard=4, midfield=4, forward=2, scorer=None) -> lineup.Lineup:
+        """返回阵型下总得分最高的首发11人及每人的位置分组; 见lineup.solve
+        与starting_lineup不同, 结果是确定的; 人数不足11或阵型不合理时抛出与starting_lineup相同的异常
+
+        Used:
+            best = club.optimal_lineup(4, 3, 3)
+            best.score, list(zip(best.slots, best.players))
+        :param scorer: 得分函数(players, 位置分组) -> float, 默认lineup.Scorer()
+        """
+        return lineup.solve(_unique(_as_list(self.players)), (guard, midfield, forward), scorer)
+
+    def best_formation(self, formations=lineup.FORMATIONS, scorer=None) -> lineup.Lineup:
+        """评估formations中的每个阵型, 返回总得分最高的最优阵容; 见lineup.best_formation"""
+        return lineup.best_formation(_unique(_as_list(self.players)), formations, scorer)
 
-    def get_players_by_location(self, location: list, quantity=1):
+    def get_players_by_location(self, location: list, quantity=1, seed=None):
         """根据location中的球员位置返回指定数量的球员
         如果筛选出的球员不够指定数量时会抛出AttributeError
 
@@ -197,59 +603,65 @@ class Club(base_class.BaseClub):
 
         :param location: 球员位置
         :param quantity: 球员数量
+        :param seed: 种子或random.Random实例, 见lineup.make_rng
         :return: list
         """
-        select = self._get_location_players(location, quantity)
+        select = self._get_location_players(location, quantity, lineup.make_rng(seed))
         if len(select) < quantity:
             raise AttributeError(f"currently club less than {quantity} players")
         return select
 
-    def _get_location_players(self, location: list, quantity: int):
-        total_players = self.players
-        if not total_players:
-            return list()
-        random.shuffle(total_players)
-        filter_ = list()
-        for players in total_players:
-            if len(filter_) >= quantity:
-                break
-            if players.location in location:
-                filter_.append(copy(players))
-        return filter_
+    def _get_location_players(self, location: list, quantity: int, rng):
+        return self.__buckets.sample(quantity, location, rng=rng)
 
-    def _get_starting_lineup(self, guard: int, midfield: int, forward: int):
+    def _get_starting_lineup(self, guard: int, midfield: int, forward: int, rng):
         filter_, lack = list(), 0
-        for locations, quantity in zip(self.locations.values(), [guard, midfield, forward, 1]):
-            select = self._get_location_players(locations, quantity)
+        for locations, quantity in zip(lineup.GROUPS.values(), [guard, midfield, forward, 1]):
+            select = self._get_location_players(locations, quantity, rng)
             if len(select) < quantity:
                 lack += (quantity - len(select))
             filter_.extend(select)
         if lack == 0:
             return filter_
-        for p in self.players:
-            if lack == 0:
-                break
-            if p not in filter_:
-                filter_.append(p)
-                lack -= 1
+        filter_.extend(self.__buckets.sample(lack, exclude=filter_, rng=rng))
         return filter_
 
-    def get_random_lineup(self):
-        """返回11位任意位置的球员"""
+    def get_random_lineup(self, seed=None):
+        """返回11位任意位置的球员; 阵容中为球员对象的引用, 需要修改时使用registry.copy_on_write
+        随机抽样不会改变club.players的顺序
+
+        :param seed: 种子或random.Random实例, 见lineup.make_rng
+        """
         if not self.players:
             return None
-        random.shuffle(self.players)
-        players_list = list()
-        for players in self.players:
-            if len(players_list) >= 11:
-                break
-            if players not in players_list:
-                players_list.append(copy(players))
-        return players_list
+        return self.__buckets.sample(11, rng=lineup.make_rng(seed))
+
+
+def _as_list(players):
+    if isinstance(players, base_class.BasePlayer):
+        return [players]
+    return players or list()
+
+
+def _unique(players):
+    seen = set()
+    for players_ in players:
+        if id(players_) not in seen:
+            seen.add(id(players_))
+            yield players_
+
+
+def _worth_of(players):
+    """球员身价换算为BASE_CURRENCY; 无法解析或汇率未配置时返回None(不计入身价统计)"""
+    try:
+        return players.worth_in()
+    except ValueError:
+        return None
 
 
 if __name__ == '__main__':
     from basedata import PLAYERS_DATABASE, COACH_DATABASE
+    from registry import PlayersRegistry
     import pprint
 
     manchester_united = [
@@ -260,7 +672,7 @@ if __name__ == '__main__':
         "city": "曼彻斯特",
         "coach": character.Coach("朗尼克", **COACH_DATABASE.get("朗尼克")),
         "honour": {"英超冠军杯": "5"},
-        "players": [character.Players(players, **PLAYERS_DATABASE.get(players)) for players in manchester_united],
+        "players": PlayersRegistry(PLAYERS_DATABASE).get_many(manchester_united),
         "birthday": "1895",
         "football_court": "老特拉福德球场",
         "league_matches": "英超",
@@ -268,4 +680,27 @@ if __name__ == '__main__':
     club = Club("曼彻斯特联", **description)
     pprint.pprint(club.starting_lineup())
 
-
+    # 转会窗口: 200个俱乐部各替换15名球员
+    import time
+    universe = [character.Players(f"{name}#{i}", **attrs)
+                for i in range(40) for name, attrs in PLAYERS_DATABASE.items()]
+
+    def transfer_window(batch):
+        clubs = [Club(f"club#{i}", players=universe[i * 30:i * 30 + 30]) for i in range(200)]
+        start = time.perf_counter()
+        for i, club_ in enumerate(clubs):
+            departures = club_.players[:15]
+            signings = universe[(i + 100) * 30 % len(universe):][:15]
+            if batch:
+                club_.remove_many_players(departures)
+                club_.add_many_players(signings)
+                continue
+            for players in departures:
+                club_.remove_players(by=character.PlayersAttr.CH_NAME, value=players.ch_name)
+            for players in signings:
+                club_.add_players(players)
+        return time.perf_counter() - start
+
+    for label, batch in (("one by one", False), ("batch", True)):
+        seconds = min(transfer_window(batch) for _ in range(3))
+        print(f"{label:<12}{seconds * 1000:8.1f} ms for 200 clubs x 15 transfers each way")
@@ -0,0 +1,242 @@
+import struct
+import marshal
+from types import MappingProxyType
+import base_class
+import character
+import club
+from character import PlayersAttr, CoachAttr
+from club import ClubAttr
+from schema import AttrSchema
+
+MAGIC = b"WFBN"
+VERSION = 1
+
+# magic, 格式版本
+_HEADER = struct.Struct("<4sH")
+
+# 记录类型: (类型编号, 基类, 属性结构)
+_PLAYERS, _COACH, _CLUB = 0, 1, 2
+_KINDS = (
+    (_PLAYERS, base_class.BasePlayer, AttrSchema.of(PlayersAttr)),
+    (_COACH, base_class.BaseCoach, AttrSchema.of(CoachAttr)),
+    (_CLUB, base_class.BaseClub, AttrSchema.of(ClubAttr)),
+)
+
+# 构造函数的位置参数名
+_ARGUMENTS = (PlayersAttr.CH_NAME, PlayersAttr.EN_NAME, ClubAttr.NAME)
+
+# 引用其他记录的属性值的容器类型
+_SINGLE, _LIST, _TUPLE = range(3)
+_RECORDS = tuple(base for _, base, _ in _KINDS)
+_PLAIN = frozenset((str, int, float, bool, dict, type(None)))
+
+
+def _mask_of(schema, names) -> int:
+    """返回属性名元组对应的存在位图"""
+    mask = 0
+    for bit, name in enumerate(schema.names):
+        if name in names:
+            mask |= 1 << bit
+    return mask
+
+
+def _names_of(schema, mask) -> tuple:
+    """返回存在位图对应的属性名元组(按属性类顺序)"""
+    return tuple(name for bit, name in enumerate(schema.names) if mask >> bit & 1)
+
+
+class CodecError(Exception):
+    """数据不是合法的编码结果、版本不符或包含无法编码的值时抛出"""
+
+
+class _Encoder(object):
+
+    def __init__(self):
+        self.records = list()
+        self.memo = dict()
+        # (类, 属性字典的键) -> (类型编号, 存在的属性名, 位图, 属性类以外的属性名);
+        # 同类记录的属性组合通常只有少数几种, 每种只计算一次
+        self.layouts = dict()
+
+    def root(self, obj):
+        if isinstance(obj, _RECORDS):
+            return _SINGLE, self.record(obj)
+        if isinstance(obj, (list, tuple)) and all(isinstance(item, _RECORDS) for item in obj):
+            return (_LIST if isinstance(obj, list) else _TUPLE), tuple(self.record(item) for item in obj)
+        raise CodecError(f"cannot encode {obj.__class__.__name__} object")
+
+    def layout(self, entity, keys) -> tuple:
+        for kind, base, schema in _KINDS:
+            if isinstance(entity, base):
+                break
+        present = tuple(name for name in schema.names if name in keys)
+        extra = tuple(key for key in keys if key not in schema.valid)
+        return kind, present, _mask_of(schema, present), extra
+
+    def record(self, entity) -> int:
+        index = self.memo.get(id(entity))
+        if index is not None:
+            return index
+        names, values = entity._state()
+        key = (entity.__class__, tuple(values))
+        layout = self.layouts.get(key)
+        if layout is None:
+            layout = self.layouts[key] = self.layout(entity, key[1])
+        kind, present, mask, extra = layout
+        links = list()
+        fields = [values[name] for name in present]
+        for position, value in enumerate(fields):
+            if type(value) not in _PLAIN:
+                fields[position] = self.value(present[position], value, links)
+        extra = {name: self.value(name, values[name], links) for name in extra}
+        # 子记录(球员/教练)先于俱乐部写入, 解码时按顺序构建即可
+        index = self.memo[id(entity)] = len(self.records)
+        self.records.append((kind, names, mask, tuple(fields), extra, tuple(links)))
+        return index
+
+    def value(self, name, value, links):
+        if type(value) in _PLAIN:
+            return value
+        if isinstance(value, MappingProxyType):
+            return dict(value)
+        if isinstance(value, _RECORDS) or (
+                isinstance(value, (list, tuple)) and value and isinstance(value[0], _RECORDS)):
+            links.append((name,) + self.root(value))
+            return None
+        return value
+
+
+class _Decoder(object):
+
+    def __init__(self, factories):
+        # 类型编号 -> (构造函数, _from_state或None)
+        self.factories = {kind: (factory, getattr(factory, "_from_state", None))
+                          for kind, factory in factories.items()}
+        self.records = list()
+        # (类型编号, 位图) -> 存在的属性名
+        self.names = dict()
+
+    def root(self, container, refs):
+        if container == _SINGLE:
+            return self.records[refs]
+        items = [self.records[index] for index in refs]
+        return items if container == _LIST else tuple(items)
+
+    def record(self, kind, names, mask, fields, extra, links):
+        present = self.names.get((kind, mask))
+        if present is None:
+            present = self.names[kind, mask] = _names_of(_KINDS[kind][2], mask)
+        values = dict(zip(present, fields))
+        if extra:
+            values.update(extra)
+        for name, container, refs in links:
+            values[name] = self.root(container, refs)
+        factory, restore = self.factories[kind]
+        if restore is not None:
+            entity = restore(names, values)
+        else:
+            # 通过modify写入属性字典的ch_name/en_name/name与构造参数同名, 构建后再写入
+            late = {key: values.pop(key) for key in _ARGUMENTS if key in values}
+            entity = factory(*names, **values)
+            for key, value in late.items():
+                entity._modify(key, value)
+        self.records.append(entity)
+
+
+def dumps(obj) -> bytes:
+    """将球员/教练/俱乐部(或它们组成的列表)编码为二进制
+
+    格式:
+        header: magic | version
+        body: marshal((记录表, 根))
+        记录: (类型, 名称, 属性存在位图, 按属性类顺序排列的属性值, 属性类以外的属性, 引用其他记录的属性)
+    属性名不写入数据, 由属性类的顺序和位图确定; 同一个字符串对象(vocab驻留的球队、国籍、位置等)
+    在整个数据中只写入一次, 之后以marshal的对象引用表示, 相当于共享的字符串表;
+    同一个对象(如俱乐部列表中共享的球员)只编码一次, 解码后仍为同一对象
+
+    Used:
+        data = codec.dumps([club_a, club_b])
+        club_a, club_b = codec.loads(data)
+    """
+    encoder = _Encoder()
+    root = encoder.root(obj)
+    try:
+        body = marshal.dumps((tuple(encoder.records), root))
+    except ValueError as e:
+        raise CodecError(f"cannot encode attribute value: {e}") from None
+    return _HEADER.pack(MAGIC, VERSION) + body
+
+
+def loads(data, players_type=character.Players, coach_type=character.Coach, club_type=club.Club):
+    """解码dumps()的结果
+
+    :param data: 二进制数据(bytes/bytearray/memoryview)
+    :param players_type: 构建球员记录的类型, 如character.Players或compact.CompactPlayers
+    :param coach_type: 构建教练记录的类型
+    :param club_type: 构建俱乐部记录的类型
+    """
+    if len(data) < _HEADER.size:
+        raise CodecError("data is truncated")
+    magic, version = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise CodecError("not world_football binary data")
+    if version != VERSION:
+        raise CodecError(f"unsupported data version: {version}")
+    try:
+        records, root = marshal.loads(memoryview(data)[_HEADER.size:])
+    except (EOFError, ValueError, TypeError) as e:
+        raise CodecError(f"corrupt data: {e}") from None
+    decoder = _Decoder({_PLAYERS: players_type, _COACH: coach_type, _CLUB: club_type})
+    for record in records:
+        decoder.record(*record)
+    return decoder.root(*root)
+
+
+def loads_as(cls, data):
+    """解码并检查根对象为cls的实例; 供各类的from_bytes使用"""
+    types = dict()
+    if issubclass(cls, base_class.BasePlayer):
+        types["players_type"] = cls
+    elif issubclass(cls, base_class.BaseCoach):
+        types["coach_type"] = cls
+    elif issubclass(cls, base_class.BaseClub):
+        types["club_type"] = cls
+    obj = loads(data, **types)
+    if not isinstance(obj, cls):
+        raise CodecError(f"data does not contain a {cls.__name__} object")
+    return obj
+
+
+if __name__ == '__main__':
+    import json
+    import pickle
+    import timeit
+    from basedata import PLAYERS_DATABASE, COACH_DATABASE
+
+    roster = [character.Players(name, **attrs) for name, attrs in PLAYERS_DATABASE.items()]
+    team = club.Club("曼彻斯特联", city="曼彻斯特", players=roster,
+                     coach=character.Coach("朗尼克", **COACH_DATABASE.get("朗尼克")))
+
+    def json_dumps(c):
+        desc = c.description()
+        desc[ClubAttr.COACH] = desc[ClubAttr.COACH].description()
+        desc[ClubAttr.PLAYERS] = [p.description() for p in desc[ClubAttr.PLAYERS]]
+        return json.dumps(desc, ensure_ascii=False).encode()
+
+    def json_loads(data):
+        desc = json.loads(data)
+        desc[ClubAttr.COACH] = character.Coach(**desc[ClubAttr.COACH])
+        desc[ClubAttr.PLAYERS] = [character.Players(**p) for p in desc[ClubAttr.PLAYERS]]
+        return club.Club(**desc)
+
+    assert loads(dumps(team)).players == team.players
+    for label, encode, decode in (
+            ("codec", dumps, loads),
+            ("pickle", pickle.dumps, pickle.loads),
+            ("json", json_dumps, json_loads),
+    ):
+        data = encode(team)
+        encode_seconds = min(timeit.repeat(lambda: encode(team), number=20, repeat=5)) / 20
+        decode_seconds = min(timeit.repeat(lambda: decode(data), number=20, repeat=5)) / 20
+        print(f"{label:<8}{len(data):8d} bytes  encode {encode_seconds * 1000:6.2f} ms  "
+              f"decode {decode_seconds * 1000:6.2f} ms  ({len(roster)} players)")
@@ -0,0 +1,265 @@
+import weakref
+from copy import copy
+import base_class
+import parsers
+import vocab
+from character import PlayersAttr, CoachAttr
+from schema import AttrSchema, fingerprint
+
+_MISSING = object()
+_NAMES = (PlayersAttr.CH_NAME, PlayersAttr.EN_NAME)
+
+
+def _slot_property(name, default, doc):
+    slot = f"_{name}"
+
+    def getter(self):
+        value = getattr(self, slot, _MISSING)
+        return default() if value is _MISSING else value
+
+    return property(getter, doc=doc)
+
+
+class _CompactRecord(object):
+    """基于__slots__的记录; 每个属性占用一个槽位, 没有实例__dict__
+    不在属性类中的参数及通过modify修改的ch_name/en_name保存在_extra中(与character中的行为一致)"""
+    __slots__ = ("_ch_name", "_en_name", "_extra")
+    SCHEMA = None
+    ATTRIBUTES = ()
+    STORED = ()
+
+    def __init__(self, ch_name: str, en_name='', **kwargs):
+        self._ch_name = ch_name
+        self._en_name = en_name
+        self._extra = None
+        for key, value in kwargs.items():
+            self._store(key, vocab.intern_field(key, value))
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({self._ch_name},{self._get('location')})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._ch_name},{self._get('location')})"
+
+    def __iter__(self):
+        return ((k, v) for k, v in self.description().items())
+
+    def __len__(self):
+        return len(self._ch_name)
+
+    def __bool__(self):
+        return bool(self._ch_name)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, self.__class__):
+            return False
+        if self._ch_name != other._ch_name or self._en_name != other._en_name:
+            return False
+        if self._extra != other._extra:
+            return False
+        return all(getattr(self, f"_{name}", _MISSING) == getattr(other, f"_{name}", _MISSING)
+                   for name in self.STORED)
+
+    def __hash__(self):
+        return hash((self._ch_name, self._en_name))
+
+    def __copy__(self):
+        """浅拷贝; 嵌套字典与原对象共享"""
+        clone = self.__class__.__new__(self.__class__)
+        clone._ch_name, clone._en_name = self._ch_name, self._en_name
+        clone._extra = None if self._extra is None else self._extra.copy()
+        for name in self.STORED:
+            value = getattr(self, f"_{name}", _MISSING)
+            if value is not _MISSING:
+                setattr(clone, f"_{name}", value)
+        return clone
+
+    @property
+    def ch_name(self) -> str:
+        """返回中文名字"""
+        return self._ch_name
+
+    @property
+    def en_name(self) -> str:
+        """返回英文名字"""
+        return self._en_name
+
+    @property
+    def fingerprint(self) -> int:
+        """返回全部属性内容的指纹; 紧凑记录不缓存指纹"""
+        values = {name: self._get(name) for name in self.STORED}
+        values.update(self._extra or dict())
+        return fingerprint(values, self._ch_name, self._en_name)
+
+    def modify(self, by=PlayersAttr.CH_NAME, value=None):
+        """根据传入的属性名称来修改对应的属性值"""
+        self.SCHEMA.validate(self, by)
+        self._modify(by, value)
+
+    def _modify(self, by, value):
+        """修改属性值但不校验属性名、不发送修改通知; 返回旧值. 供bulk批量修改使用"""
+        old = self._get(by)
+        self._store(by, vocab.intern_field(by, value))
+        return old
+
+    def description(self) -> dict:
+        """返回所有属性信息"""
+        desc = {name: copy(self._get(name)) for name in self.ATTRIBUTES}
+        desc["ch_name"] = self._ch_name
+        desc["en_name"] = self._en_name
+        return desc
+
+    def view(self):
+        """返回所有属性的只读视图(types.MappingProxyType); 不复制属性值, 紧凑记录不缓存视图"""
+        return self.SCHEMA.view({name: self._get(name) for name in self.ATTRIBUTES},
+                                ch_name=self._ch_name, en_name=self._en_name)
+
+    def _state(self) -> tuple:
+        """返回(名称, 已设置的属性); 供codec编码使用"""
+        values = {name: getattr(self, f"_{name}") for name in self.STORED if hasattr(self, f"_{name}")}
+        values.update(self._extra or dict())
+        return (self._ch_name, self._en_name), values
+
+    def _get(self, name):
+        if name in self.STORED:
+            return getattr(self, f"_{name}", None)
+        return (self._extra or dict()).get(name)
+
+    def _store(self, name, value):
+        if name in self.STORED:
+            setattr(self, f"_{name}", value)
+            return
+        if self._extra is None:
+            self._extra = dict()
+        self._extra[name] = value
+
+
+class CompactPlayers(_CompactRecord, base_class.BasePlayer):
+    """ 紧凑球员类; 与character.Players的属性、modify、description及比较行为一致,
+    但每个属性保存在__slots__槽位中, 不为每个实例分配__dict__和属性字典
+
+    Used:
+        p = CompactPlayers("德赫亚", **PLAYERS_DATABASE.get("德赫亚"))
+        p.modify(by=PlayersAttr.AGE, value=33)
+    """
+    SCHEMA = AttrSchema.of(PlayersAttr)
+    ATTRIBUTES = SCHEMA.names
+    STORED = tuple(name for name in ATTRIBUTES if name not in _NAMES)
+    __slots__ = tuple(f"_{name}" for name in STORED) + ("_valuation", "_watchers")
+
+    honour = _slot_property(PlayersAttr.HONOUR, dict, "返回球员个人荣誉")
+    ability = _slot_property(PlayersAttr.ABILITY, dict, "返回球员能力分布")
+    location = _slot_property(PlayersAttr.LOCATION, str, "返回球员所在球场位置; [门将, 后卫, 中场, 前锋]")
+    number = _slot_property(PlayersAttr.NUMBER, str, "返回球员球衣所属号码")
+    team = _slot_property(PlayersAttr.TEAM, str, "返回球员所在球队")
+    worth = _slot_property(PlayersAttr.WORTH, str, "返回球员身价; 万欧")
+    preferred_foot = _slot_property(PlayersAttr.PREFERRED_FOOT, str, "返回球员惯用脚; [左脚, 右脚, 左右脚]")
+    nationality = _slot_property(PlayersAttr.NATIONALITY, str, "返回球员国籍")
+    height = _slot_property(PlayersAttr.HEIGHT, str, "返回球员身高")
+    birthday = _slot_property(PlayersAttr.BIRTHDAY, str, "返回球员出生日期")
+    age = _slot_property(PlayersAttr.AGE, int, "返回球员年龄")
+
+    def __init__(self, ch_name: str, en_name='', **kwargs):
+        self._valuation = None
+        self._watchers = None
+        super().__init__(ch_name, en_name, **kwargs)
+
+    def __copy__(self):
+        """浅拷贝; 不继承修改通知"""
+        clone = super().__copy__()
+        clone._valuation = None
+        clone._watchers = None
+        return clone
+
+    def __getstate__(self):
+        """pickle时不保存修改通知(弱引用)及解析缓存; 俱乐部在恢复时重新注册通知"""
+        slots = ("_ch_name", "_en_name", "_extra") + tuple(f"_{name}" for name in self.STORED)
+        return None, {slot: getattr(self, slot) for slot in slots if hasattr(self, slot)}
+
+    def __setstate__(self, state):
+        _, slots = state
+        self._valuation = None
+        self._watchers = None
+        for slot, value in slots.items():
+            setattr(self, slot, value)
+
+    @property
+    def valuation(self):
+        """返回解析后的身价parsers.Valuation; 无法解析时返回None"""
+        if self._valuation is None:
+            self._valuation = parsers.parse_valuation(self.worth) or False
+        return self._valuation or None
+
+    def worth_in(self, currency=parsers.BASE_CURRENCY, rates=None):
+        """返回换算为指定货币的身价数值; 无法解析时返回None"""
+        valuation = self.valuation
+        return None if valuation is None else valuation.to(currency, rates)
+
+    def watch(self, watcher):
+        """注册修改通知; 见character.Players.watch"""
+        if self._watchers is None:
+            self._watchers = weakref.WeakSet()
+        self._watchers.add(watcher)
+
+    def unwatch(self, watcher):
+        """取消修改通知"""
+        if self._watchers is not None:
+            self._watchers.discard(watcher)
+
+    def modify(self, by=PlayersAttr.CH_NAME, value=None):
+        """根据传入的属性名称来修改对应的属性值"""
+        self.SCHEMA.validate(self, by)
+        old = self._modify(by, value)
+        if self._watchers:
+            for watcher in list(self._watchers):
+                watcher.players_modified(self, by, old, value)
+
+    def _modify(self, by, value):
+        old = super()._modify(by, value)
+        if by == PlayersAttr.WORTH:
+            self._valuation = None
+        return old
+
+    def _watching(self) -> list:
+        """返回当前注册的修改通知对象"""
+        return list(self._watchers) if self._watchers else list()
+
+
+class CompactCoach(_CompactRecord, base_class.BaseCoach):
+    """ 紧凑教练类; 与character.Coach的属性、modify、description及比较行为一致
+
+    Used:
+        nick = CompactCoach("朗尼克", **COACH_DATABASE.get("朗尼克"))
+    """
+    SCHEMA = AttrSchema.of(CoachAttr)
+    ATTRIBUTES = SCHEMA.names
+    STORED = tuple(name for name in ATTRIBUTES if name not in _NAMES)
+    __slots__ = tuple(f"_{name}" for name in STORED)
+
+    age = _slot_property(CoachAttr.AGE, str, "返回教练年龄")
+    birthday = _slot_property(CoachAttr.BIRTHDAY, str, "返回教练出生日期")
+    height = _slot_property(CoachAttr.HEIGHT, str, "返回教练身高")
+    nationality = _slot_property(CoachAttr.NATIONALITY, str, "返回教练国籍")
+    team = _slot_property(CoachAttr.TEAM, str, "返回教练所在球队名称")
+    location = _slot_property(CoachAttr.LOCATION, str, "返回教练所在球场位置; [主教练, 助理教练]")
+    honour = _slot_property(CoachAttr.HONOUR, dict, "返回教练个人荣誉")
+
+
+if __name__ == '__main__':
+    import gc
+    import tracemalloc
+    import character
+    from basedata import PLAYERS_DATABASE
+
+    replicas = 1000
+    for cls in (character.Players, CompactPlayers):
+        gc.collect()
+        tracemalloc.start()
+        universe = [cls(name, **attrs) for _ in range(replicas) for name, attrs in PLAYERS_DATABASE.items()]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{cls.__name__:<16}{len(universe)} records  {current / 2 ** 20:8.1f} MiB  "
+              f"{current / len(universe):6.0f} bytes/record")
+        del universe
@@ -0,0 +1,251 @@
+from types import MappingProxyType
+import base_class
+import character
+import parsers
+import vocab
+from character import PlayersAttr
+from schema import AttrSchema
+
+_MISSING = object()
+_SCHEMA = AttrSchema.of(PlayersAttr)
+_FIELDS = tuple(name for name in _SCHEMA.names if name not in (PlayersAttr.CH_NAME, PlayersAttr.EN_NAME))
+_POSITIONS = {name: index for index, name in enumerate(_FIELDS)}
+
+
+def _field_property(name, default, doc):
+    position = _POSITIONS[name]
+
+    def getter(self):
+        value = self._values[position]
+        return default() if value is _MISSING else value
+
+    return property(getter, doc=doc)
+
+
+def _freeze(name, value):
+    value = vocab.intern_field(name, value)
+    if isinstance(value, dict):
+        return MappingProxyType(dict(value))
+    return value
+
+
+def _attrs_of(values: dict) -> dict:
+    """_state()中的属性转换为构造参数: 只保留PlayersAttr中的属性(不含名称), 只读字典还原为普通字典
+    属性缺失与属性值为None在_state()中是不同的, 因此不按值过滤"""
+    return {name: dict(value) if isinstance(value, MappingProxyType) else value
+            for name, value in values.items() if name in _POSITIONS}
+
+
+class FrozenPlayers(base_class.BasePlayer):
+    """ 不可变球员记录; 所有属性保存在一个元组中, honour/ability为只读字典
+
+    with_()返回新的记录, 只替换被修改的属性, 其余属性(包括嵌套字典)与原记录共享同一对象,
+    因此同一阵容的大量假设版本可以低成本共存.
+
+    Used:
+        p = FrozenPlayers("德赫亚", **PLAYERS_DATABASE.get("德赫亚"))
+        older = p.with_(age=p.age + 1, worth="3000万英镑")
+        older.honour is p.honour        # True, 未修改的属性共享
+        # 与可变球员互相转换
+        FrozenPlayers.from_players(players).thaw()
+    """
+    __slots__ = ("_ch_name", "_en_name", "_values", "_hash")
+
+    honour = _field_property(PlayersAttr.HONOUR, dict, "返回球员个人荣誉; 只读")
+    ability = _field_property(PlayersAttr.ABILITY, dict, "返回球员能力分布; 只读")
+    location = _field_property(PlayersAttr.LOCATION, str, "返回球员所在球场位置; [门将, 后卫, 中场, 前锋]")
+    number = _field_property(PlayersAttr.NUMBER, str, "返回球员球衣所属号码")
+    team = _field_property(PlayersAttr.TEAM, str, "返回球员所在球队")
+    worth = _field_property(PlayersAttr.WORTH, str, "返回球员身价; 万欧")
+    preferred_foot = _field_property(PlayersAttr.PREFERRED_FOOT, str, "返回球员惯用脚; [左脚, 右脚, 左右脚]")
+    nationality = _field_property(PlayersAttr.NATIONALITY, str, "返回球员国籍")
+    height = _field_property(PlayersAttr.HEIGHT, str, "返回球员身高")
+    birthday = _field_property(PlayersAttr.BIRTHDAY, str, "返回球员出生日期")
+    age = _field_property(PlayersAttr.AGE, int, "返回球员年龄")
+
+    def __init__(self, ch_name: str, en_name='', **kwargs):
+        """
+        :param ch_name: 球员中文名称
+        :param en_name: 球员英文名称
+        :param kwargs: 球员所具属性集合; 只接受PlayersAttr中的属性
+        """
+        values = [_MISSING] * len(_FIELDS)
+        for name, value in kwargs.items():
+            if name not in _POSITIONS:
+                raise ValueError(
+                    f"{self.__class__.__name__} object not attribute: '{name}'"
+                )
+            values[_POSITIONS[name]] = _freeze(name, value)
+        self._init(ch_name, en_name, tuple(values))
+
+    def _init(self, ch_name, en_name, values):
+        object.__setattr__(self, "_ch_name", ch_name)
+        object.__setattr__(self, "_en_name", en_name)
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_hash", hash((ch_name, en_name)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} object is immutable; use with_()")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} object is immutable")
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({self._ch_name},{self.location})"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._ch_name},{self.location})"
+
+    def __iter__(self):
+        return ((k, v) for k, v in self.description().items())
+
+    def __len__(self):
+        return len(self._ch_name)
+
+    def __bool__(self):
+        return bool(self._ch_name)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, self.__class__):
+            return False
+        return (self._ch_name == other._ch_name and self._en_name == other._en_name
+                and self._values == other._values)
+
+    def __hash__(self):
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return self.__class__._restore, (self._ch_name, self._en_name, _attrs_of(self._state()[1]))
+
+    @classmethod
+    def _restore(cls, ch_name, en_name, values):
+        return cls(ch_name, en_name, **values)
+
+    @property
+    def ch_name(self) -> str:
+        """返回球员中文名字"""
+        return self._ch_name
+
+    @property
+    def en_name(self) -> str:
+        """返回球员英文名字"""
+        return self._en_name
+
+    @property
+    def valuation(self):
+        """返回解析后的身价parsers.Valuation; 无法解析时返回None"""
+        return parsers.parse_valuation(self.worth)
+
+    def worth_in(self, currency=parsers.BASE_CURRENCY, rates=None):
+        """返回换算为指定货币的身价数值; 无法解析时返回None"""
+        valuation = self.valuation
+        return None if valuation is None else valuation.to(currency, rates)
+
+    def with_(self, **changes):
+        """返回修改了部分属性的新记录; 未修改的属性与原记录共享
+
+        :param changes: 属性名与新值, 属性名必须在PlayersAttr中
+        """
+        ch_name, en_name = self._ch_name, self._en_name
+        values = None
+        for name, value in changes.items():
+            if name == PlayersAttr.CH_NAME:
+                ch_name = value
+                continue
+            if name == PlayersAttr.EN_NAME:
+                en_name = value
+                continue
+            if name not in _POSITIONS:
+                raise ValueError(
+                    f"{self.__class__.__name__} object not attribute: '{name}'"
+                )
+            if values is None:
+                values = list(self._values)
+            values[_POSITIONS[name]] = _freeze(name, value)
+        clone = self.__class__.__new__(self.__class__)
+        clone._init(ch_name, en_name, self._values if values is None else tuple(values))
+        return clone
+
+    def watch(self, watcher):
+        """不可变记录不会被修改, 不需要注册修改通知"""
+
+    def unwatch(self, watcher):
+        """不可变记录不会被修改, 不需要取消修改通知"""
+
+    def modify(self, by=PlayersAttr.CH_NAME, value=None):
+        """不可变记录不支持原地修改; 使用with_()"""
+        raise AttributeError(f"{self.__class__.__name__} object is immutable; use with_()")
+
+    def description(self) -> dict:
+        """返回球员的所有属性信息; 嵌套字典复制为普通字典"""
+        desc = dict()
+        for name, value in zip(_FIELDS, self._values):
+            if value is _MISSING:
+                value = None
+            elif isinstance(value, MappingProxyType):
+                value = dict(value)
+            desc[name] = value
+        desc[PlayersAttr.CH_NAME] = self._ch_name
+        desc[PlayersAttr.EN_NAME] = self._en_name
+        return desc
+
+    def view(self):
+        """返回所有属性的只读视图"""
+        desc = {name: None if value is _MISSING else value for name, value in zip(_FIELDS, self._values)}
+        desc[PlayersAttr.CH_NAME] = self._ch_name
+        desc[PlayersAttr.EN_NAME] = self._en_name
+        return MappingProxyType(desc)
+
+    def _state(self) -> tuple:
+        """返回(名称, 已设置的属性); 供codec编码使用"""
+        values = {name: value for name, value in zip(_FIELDS, self._values) if value is not _MISSING}
+        return (self._ch_name, self._en_name), values
+
+    @classmethod
+    def from_players(cls, players):
+        """根据character.Players(或其他BasePlayer实现)构建不可变记录; 只保留已设置的属性(包括值为None的属性)"""
+        _, values = players._state()
+        return cls(players.ch_name, players.en_name, **_attrs_of(values))
+
+    def thaw(self) -> character.Players:
+        """返回对应的可变character.Players"""
+        return character.Players(self._ch_name, self._en_name, **_attrs_of(self._state()[1]))
+
+
+if __name__ == '__main__':
+    import timeit
+    import tracemalloc
+    from copy import copy
+    from basedata import PLAYERS_DATABASE
+
+    mutable = [character.Players(name, **attrs) for name, attrs in PLAYERS_DATABASE.items()]
+    frozen = [FrozenPlayers(name, **attrs) for name, attrs in PLAYERS_DATABASE.items()]
+
+    def what_if_mutable():
+        versions = list()
+        for p in mutable:
+            clone = copy(p)
+            clone.modify(PlayersAttr.AGE, p.age + 1)
+            versions.append(clone)
+        return versions
+
+    def what_if_frozen():
+        return [p.with_(age=p.age + 1) for p in frozen]
+
+    for label, func in (("copy + modify", what_if_mutable), ("with_", what_if_frozen)):
+        seconds = min(timeit.repeat(func, number=20, repeat=5)) / 20 / len(PLAYERS_DATABASE)
+        tracemalloc.start()
+        rosters = [func() for _ in range(100)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:<16}{seconds * 1e6:6.2f} us/update  "
+              f"{current / (100 * len(PLAYERS_DATABASE)):6.0f} bytes/version")
+        del rosters
@@ -0,0 +1,127 @@
+from bisect import bisect_left, insort
+import vocab
+import parsers
+from character import PlayersAttr
+
+
+class HonourIndex(object):
+    """ 荣誉索引; 荣誉字典只在添加时解析一次为整数次数, 奖杯名称编码到共享词表(vocab.shared("trophy"))
+
+    维护:
+        每个对象的{奖杯编码: 次数}与荣誉总数
+        按荣誉总数降序排列的排行榜
+        每个奖杯按获得次数降序排列的倒排表
+    排行榜与倒排表在添加时用二分插入维护, 查询前k名只需切片.
+
+    适用于球员、教练和俱乐部; 对象以名称(ch_name或俱乐部name)区分.
+
+    Used:
+        index = HonourIndex.from_database(PLAYERS_DATABASE)
+        index.total("克里斯蒂亚诺·罗纳尔多")
+        # 获得过欧洲杯冠军的球员
+        index.winners("欧洲杯冠军")
+        # 荣誉总数前10的球员 / 欧洲联赛冠军杯赛冠军次数前5的球员
+        index.leaderboard(10)
+        index.leaderboard(5, trophy="欧洲联赛冠军杯赛冠军")
+    """
+
+    def __init__(self):
+        self.vocabulary = vocab.shared("trophy")
+        self.__counts = dict()
+        self.__totals = dict()
+        self.__order = dict()
+        self.__ranking = list()
+        self.__winners = dict()
+
+    def __len__(self):
+        return len(self.__counts)
+
+    def __contains__(self, name):
+        return name in self.__counts
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(entries={len(self)}, trophies={len(self.__winners)})"
+
+    @classmethod
+    def from_database(cls, database):
+        """根据PLAYERS_DATABASE/COACH_DATABASE结构的映射构建索引"""
+        index = cls()
+        for name, attrs in database.items():
+            index.add(name, attrs.get(PlayersAttr.HONOUR))
+        return index
+
+    @classmethod
+    def from_entities(cls, entities):
+        """根据Players/Coach/Club对象列表构建索引"""
+        index = cls()
+        for entity in entities:
+            name = entity.name if hasattr(entity, "name") else entity.ch_name
+            index.add(name, entity.honour)
+        return index
+
+    def add(self, name: str, honour: dict):
+        """添加或更新一个对象的荣誉"""
+        if name in self.__counts:
+            self.remove(name)
+        counts = dict()
+        for trophy, value in (honour or dict()).items():
+            code = self.vocabulary.encode(trophy)
+            counts[code] = counts.get(code, 0) + parsers.parse_honour_count(value)
+        order = self.__order.setdefault(name, len(self.__order))
+        self.__counts[name] = counts
+        self.__totals[name] = total = sum(counts.values())
+        insort(self.__ranking, (-total, order, name))
+        for code, count in counts.items():
+            insort(self.__winners.setdefault(code, list()), (-count, order, name))
+
+    def remove(self, name: str):
+        """移除一个对象的荣誉; 不存在时忽略"""
+        counts = self.__counts.pop(name, None)
+        if counts is None:
+            return
+        order = self.__order[name]
+        _discard(self.__ranking, (-self.__totals.pop(name), order, name))
+        for code, count in counts.items():
+            _discard(self.__winners[code], (-count, order, name))
+
+    def counts(self, name: str) -> dict:
+        """返回{奖杯: 次数}"""
+        return {self.vocabulary.decode(code): count for code, count in self.__counts[name].items()}
+
+    def count(self, name: str, trophy: str) -> int:
+        """返回某对象获得某奖杯的次数"""
+        return self.__counts.get(name, dict()).get(self.vocabulary.code(trophy), 0)
+
+    def total(self, name: str) -> int:
+        """返回某对象的荣誉总数"""
+        return self.__totals.get(name, 0)
+
+    def winners(self, trophy: str) -> list:
+        """返回获得过某奖杯的全部对象; [(名称, 次数), ...] 按次数降序"""
+        return [(name, -count) for count, _, name in self.__winners.get(self.vocabulary.code(trophy), ())]
+
+    def leaderboard(self, k=10, trophy=None) -> list:
+        """返回前k名; trophy为None时按荣誉总数排名, 否则按该奖杯次数排名
+
+        :return: [(名称, 次数), ...]
+        """
+        if trophy is None:
+            return [(name, -total) for total, _, name in self.__ranking[:k]]
+        ranking = self.__winners.get(self.vocabulary.code(trophy), ())
+        return [(name, -count) for count, _, name in ranking[:k]]
+
+
+def _discard(ordered: list, item):
+    position = bisect_left(ordered, item)
+    if position < len(ordered) and ordered[position] == item:
+        del ordered[position]
+
+
+if __name__ == '__main__':
+    from basedata import PLAYERS_DATABASE, COACH_DATABASE
+
+    players = HonourIndex.from_database(PLAYERS_DATABASE)
+    print(players, players.leaderboard(5))
+    print(players.winners("欧洲杯冠军"))
+    print(players.leaderboard(3, trophy="欧洲联赛冠军杯赛冠军"))
+    print(HonourIndex.from_database(COACH_DATABASE).leaderboard(3))
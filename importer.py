@@ -0,0 +1,210 @@
+import os
+import csv
+import json
+import time
+from itertools import islice
+import character
+import parsers
+from character import PlayersAttr
+
+FORMATS = ("jsonl", "csv")
+_FIELDS = frozenset(value for key, value in PlayersAttr.__dict__.items() if key.isupper())
+_DICT_FIELDS = (PlayersAttr.ABILITY, PlayersAttr.HONOUR)
+
+
+class RejectedRow(ValueError):
+    """单行数据无法转换为球员属性时抛出"""
+
+
+class ImportStats(object):
+    """导入统计; rejected只保留前max_rejected条(行号, 原因), rejected_count为总数"""
+
+    def __init__(self, max_rejected=1000):
+        self.rows = 0
+        self.accepted = 0
+        self.rejected_count = 0
+        self.rejected = list()
+        self.max_rejected = max_rejected
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(rows={self.rows}, accepted={self.accepted}, "
+                f"rejected={self.rejected_count}, rows_per_second={self.rows_per_second:.0f})")
+
+    @property
+    def elapsed(self) -> float:
+        """返回已耗费的秒数"""
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        """返回每秒处理的行数"""
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def reject(self, line: int, reason: str):
+        self.rejected_count += 1
+        if len(self.rejected) < self.max_rejected:
+            self.rejected.append((line, reason))
+
+
+def normalize(raw: dict) -> tuple:
+    """将一行原始数据转换为(中文名, 属性字典), 属性字典结构与PLAYERS_DATABASE中的值一致
+    未知字段被忽略; 缺少ch_name、嵌套字段不是合法字典或年龄无法解析时抛出RejectedRow
+    """
+    attrs = dict()
+    for key, value in raw.items():
+        key = (key or "").strip().lower()
+        if key not in _FIELDS:
+            continue
+        attrs[key] = value.strip() if isinstance(value, str) else value
+    name = attrs.pop(PlayersAttr.CH_NAME, None)
+    if not name:
+        raise RejectedRow("missing ch_name")
+    for field in _DICT_FIELDS:
+        value = attrs.get(field)
+        if value in (None, ""):
+            attrs[field] = dict()
+            continue
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise RejectedRow(f"invalid json in '{field}'") from None
+        if not isinstance(value, dict):
+            raise RejectedRow(f"'{field}' is not an object")
+        attrs[field] = value
+    age = attrs.get(PlayersAttr.AGE)
+    if age not in (None, ""):
+        attrs[PlayersAttr.AGE] = parsers.parse_age(age)
+        if attrs[PlayersAttr.AGE] is None:
+            raise RejectedRow(f"invalid age: {age!r}")
+    if PlayersAttr.NUMBER in attrs and attrs[PlayersAttr.NUMBER] is not None:
+        attrs[PlayersAttr.NUMBER] = str(attrs[PlayersAttr.NUMBER])
+    return name, attrs
+
+
+class PlayersImporter(object):
+    """ 流式导入球员数据(JSONL/CSV); 逐行读取, 内存占用只与chunk_size相关
+
+    CSV中的ability/honour列为json字符串; 字段名与PlayersAttr一致, 未知字段被忽略.
+
+    Used:
+        importer = PlayersImporter("scouting.jsonl", chunk_size=5000)
+        for players in importer.players():
+            ...
+        # 或按批输出列式数据
+        for table in importer.batches(columnar=True):
+            ...
+        importer.stats.rows_per_second, importer.stats.rejected
+    """
+
+    def __init__(self, source, format=None, chunk_size=10000, max_rejected=1000):
+        """
+        :param source: 文件路径或已打开的文本文件对象
+        :param format: "jsonl"或"csv"; 为None时根据文件扩展名判断
+        :param chunk_size: 每批输出的记录数
+        :param max_rejected: stats中保留的被拒绝行明细上限
+        """
+        if format is None:
+            path = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+            format = os.path.splitext(str(path))[1].lstrip(".").lower()
+            format = "jsonl" if format in ("json", "ndjson") else format
+        if format not in FORMATS:
+            raise ValueError(f"unsupported format: '{format}', expected one of {FORMATS}")
+        self.source = source
+        self.format = format
+        self.chunk_size = chunk_size
+        self.stats = ImportStats(max_rejected)
+
+    def records(self):
+        """逐条产出通过校验的(中文名, 属性字典)"""
+        self.stats = stats = ImportStats(self.stats.max_rejected)
+        with self._open() as f:
+            for line, raw in self._read(f):
+                stats.rows += 1
+                try:
+                    if raw is None:
+                        raise RejectedRow("invalid json")
+                    if not isinstance(raw, dict):
+                        raise RejectedRow("row is not an object")
+                    record = normalize(raw)
+                except RejectedRow as e:
+                    stats.reject(line, str(e))
+                    continue
+                stats.accepted += 1
+                yield record
+        stats.finished = time.perf_counter()
+
+    def players(self):
+        """逐个产出character.Players"""
+        for name, attrs in self.records():
+            yield character.Players(name, **attrs)
+
+    def batches(self, columnar=False):
+        """按chunk_size分批产出; columnar为False时每批为[Players, ...], 否则为table.PlayerTable"""
+        if columnar:
+            from table import PlayerTable
+        records = self.records()
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                return
+            if columnar:
+                yield PlayerTable.from_records(chunk)
+            else:
+                yield [character.Players(name, **attrs) for name, attrs in chunk]
+
+    def _open(self):
+        if isinstance(self.source, (str, os.PathLike)):
+            # utf-8-sig: 去掉Excel等工具写入的BOM, 否则BOM会成为第一个列名的一部分
+            return open(self.source, "r", encoding="utf-8-sig", newline="")
+        return _Borrowed(self.source)
+
+    def _read(self, f):
+        if self.format == "csv":
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, row
+            return
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except ValueError:
+                yield line, None
+
+
+class _Borrowed(object):
+    """外部传入的文件对象; 导入结束后不关闭"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+if __name__ == '__main__':
+    import tempfile
+    from basedata import PLAYERS_DATABASE
+
+    path = os.path.join(tempfile.gettempdir(), "players.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(1000):
+            for name, attrs in PLAYERS_DATABASE.items():
+                f.write(json.dumps(dict(attrs, ch_name=f"{name}#{i}"), ensure_ascii=False) + "\n")
+        f.write("{broken\n")
+        f.write(json.dumps({"en_name": "no chinese name"}) + "\n")
+
+    importer = PlayersImporter(path, chunk_size=5000)
+    count = sum(len(batch) for batch in importer.batches())
+    print(count, importer.stats, importer.stats.rejected)
+    importer = PlayersImporter(path, chunk_size=50000)
+    count = sum(len(batch) for batch in importer.batches(columnar=True))
+    print(count, importer.stats)
+    os.remove(path)
@@ -0,0 +1,400 @@
+import heapq
+import random
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import accumulate
+import traits
+
+# 位置分组与各分组包含的球员位置; 与Club.locations一致
+GROUPS = {
+    "后卫": ['左后卫', '后卫', '右后卫'],
+    "中场": ['中场', '前腰', '中卫', '后腰', '中前卫'],
+    "前锋": ['前锋', '中锋', '左边锋', '右边锋'],
+    "守门员": ['守门员'],
+}
+_GROUP_OF = {location: group for group, locations in GROUPS.items() for location in locations}
+GOALKEEPER = "守门员"
+
+# 所有阵型(后卫, 中场, 前锋); 另有1名守门员
+FORMATIONS = tuple((guard, midfield, 10 - guard - midfield)
+                   for guard in range(3, 6) for midfield in range(2, 7) if 1 <= 10 - guard - midfield <= 3)
+
+# 最优阵容; formation为(后卫, 中场, 前锋), players与slots一一对应, slots为每名球员所在的位置分组
+Lineup = namedtuple("Lineup", ["formation", "score", "players", "slots"])
+
+_local = threading.local()
+
+
+def make_rng(seed=None) -> random.Random:
+    """返回一次抽样使用的随机数生成器; 不使用random模块的全局状态
+
+    :param seed: None -> 当前线程独立的生成器(以系统熵初始化), 线程之间互不影响;
+                 int/str/bytes -> 以该种子新建的生成器, 结果可重现;
+                 random.Random实例 -> 原样返回(由调用方保证不在多个线程间共享)
+    """
+    if isinstance(seed, random.Random):
+        return seed
+    if seed is None:
+        rng = getattr(_local, "rng", None)
+        if rng is None:
+            rng = _local.rng = random.Random()
+        return rng
+    if not isinstance(seed, (int, str, bytes)):
+        raise ValueError(f"seed must be int, str, bytes or random.Random, not {seed.__class__.__name__}")
+    return random.Random(seed)
+
+
+def derive_seed(seed, *key) -> int:
+    """由主种子和键派生独立的64位种子, 如derive_seed(2023, 赛季, 轮次, 比赛编号)
+    使用blake2b计算, 与进程、线程及调用顺序无关; 不同的键得到互不相关的随机序列"""
+    if not isinstance(seed, (int, str, bytes)):
+        raise ValueError(f"seed must be int, str or bytes, not {seed.__class__.__name__}")
+    digest = hashlib.blake2b(repr((seed,) + key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def split_seed(seed, n: int) -> list:
+    """将一个种子拆分为n个独立的种子, 例如每场比赛一个"""
+    return [derive_seed(seed, index) for index in range(n)]
+
+
+def group_of(location):
+    """返回球员位置所属的分组(后卫/中场/前锋/守门员); 未知位置返回None"""
+    return _GROUP_OF.get(location)
+
+
+class PositionBuckets(object):
+    """ 按球员位置(location)分桶的球员列表, 用于不修改阵容的随机抽样
+    同一球员对象只保存一次; 每个桶始终按球员在阵容中的顺序排列, 由增删及位置变化维护(O(桶大小)),
+    从若干位置中不放回地抽取k名球员只生成k个随机下标, 不复制也不打乱任何列表, 也不修改任何状态
+    抽样结果只取决于阵容和种子, 与增删球员的历史无关(pickle、codec解码或用同一阵容新建的俱乐部得到相同的抽样)
+
+    Used:
+        buckets = PositionBuckets(club.players)
+        buckets.sample(4, GROUPS["后卫"])
+        buckets.sample(11)      # 任意位置
+    """
+
+    def __init__(self, players=()):
+        self.__buckets = dict()
+        # id(球员) -> [位置, 在桶中的下标, 每次加入的序号]; 第一个序号即球员在阵容中的位置
+        self.__entries = dict()
+        self.__sequence = 0
+        for players_ in players:
+            self.add(players_)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __repr__(self):
+        sizes = {location: len(bucket) for location, bucket in self.__buckets.items()}
+        return f"{self.__class__.__name__}({sizes})"
+
+    def add(self, players):
+        self.__sequence += 1
+        entry = self.__entries.get(id(players))
+        if entry is not None:
+            entry[2].append(self.__sequence)
+            return
+        entry = self.__entries[id(players)] = [players.location, None, [self.__sequence]]
+        entry[1] = self.__insert(players.location, players)
+
+    def discard(self, players, every=False):
+        """移除球员在阵容中的第一次出现(与list.remove一致); every为True时移除全部出现"""
+        entry = self.__entries.get(id(players))
+        if entry is None:
+            return
+        del entry[2][:None if every else 1]
+        if entry[2]:
+            # 球员在阵容中的位置变为下一次出现的位置, 在桶中移到对应的位置
+            self.__remove(entry[0], entry[1])
+            entry[1] = self.__insert(entry[0], players)
+            return
+        del self.__entries[id(players)]
+        self.__remove(entry[0], entry[1])
+
+    def update(self, players):
+        """球员位置修改后移动到新的桶"""
+        entry = self.__entries.get(id(players))
+        if entry is None or entry[0] == players.location:
+            return
+        self.__remove(entry[0], entry[1])
+        entry[0], entry[1] = players.location, self.__insert(players.location, players)
+
+    def count(self, locations=None) -> int:
+        """返回位于locations中的球员人数; locations为None时返回全部人数"""
+        if locations is None:
+            return len(self.__entries)
+        return sum(len(self.__buckets.get(location, ())) for location in set(locations))
+
+    def sample(self, k: int, locations=None, exclude=(), rng=None) -> list:
+        """从位于locations中的球员里不放回地随机抽取k名; 人数不足时返回全部符合条件的球员(顺序随机)
+        相同的阵容、参数和种子总是得到相同的结果
+
+        :param k: 抽取人数
+        :param locations: 球员位置列表, None表示任意位置(按位置名称排序)
+        :param exclude: 不参与抽取的球员
+        :param rng: 随机数生成器或种子; 见make_rng
+        """
+        rng = make_rng(rng)
+        if locations is None:
+            locations = sorted(self.__buckets, key=str)
+        buckets = [self.__buckets[location] for location in dict.fromkeys(locations)
+                   if location in self.__buckets]
+        bounds = list(accumulate(len(bucket) for bucket in buckets))
+        total = bounds[-1] if bounds else 0
+        excluded = {id(players) for players in exclude}
+        # 被排除的球员最多占用len(excluded)个下标, 多抽这些下标即可保证数量
+        draws = rng.sample(range(total), min(total, k + len(excluded)))
+        result = list()
+        for index in draws:
+            which = bisect_right(bounds, index)
+            players = buckets[which][index - (bounds[which - 1] if which else 0)]
+            if id(players) in excluded:
+                continue
+            result.append(players)
+            if len(result) == k:
+                break
+        return result
+
+    def __insert(self, location, players) -> int:
+        """按球员在阵容中第一次出现的位置插入桶中; 新球员位于阵容末尾, 通常直接追加到桶尾"""
+        bucket = self.__buckets.setdefault(location, list())
+        first = self.__entries[id(players)][2][0]
+        index = len(bucket)
+        while index and self.__entries[id(bucket[index - 1])][2][0] > first:
+            index -= 1
+        bucket.insert(index, players)
+        self.__reindex(bucket, index + 1)
+        return index
+
+    def __remove(self, location, index):
+        bucket = self.__buckets[location]
+        del bucket[index]
+        self.__reindex(bucket, index)
+        if not bucket:
+            del self.__buckets[location]
+
+    def __reindex(self, bucket, start):
+        for index in range(start, len(bucket)):
+            self.__entries[id(bucket[index])][1] = index
+
+
+class Scorer(object):
+    """ 球员在某个位置分组上的得分, 默认由三部分相加:
+        身价: worth_in()换算为千万BASE_CURRENCY后乘以worth_weight, 无法解析或汇率未配置记为0
+        特点: (优势数量 - 弱点数量) * trait_weight
+        位置适配: fit[(球员分组, 位置分组)], 未列出的组合记为mismatch; 守门员与非守门员互换记为goalkeeper_mismatch
+    可以调整权重, 或继承后重写__call__, 也可以直接向solve传入任意函数(players, 位置分组) -> float
+
+    Used:
+        solve(players, (4, 3, 3), scorer=Scorer(worth_weight=2.0, trait_weight=0))
+    """
+    FIT = {
+        ("后卫", "后卫"): 3.0, ("中场", "中场"): 3.0, ("前锋", "前锋"): 3.0, ("守门员", "守门员"): 3.0,
+        ("后卫", "中场"): 1.0, ("中场", "后卫"): 1.0, ("中场", "前锋"): 1.0, ("前锋", "中场"): 1.0,
+    }
+
+    def __init__(self, worth_weight=1.0, trait_weight=0.1, fit=None, mismatch=0.0, goalkeeper_mismatch=-10.0):
+        self.worth_weight = worth_weight
+        self.trait_weight = trait_weight
+        self.fit = self.FIT if fit is None else fit
+        self.mismatch = mismatch
+        self.goalkeeper_mismatch = goalkeeper_mismatch
+
+    def __call__(self, players, group) -> float:
+        return self.base(players) + self.position_fit(group_of(players.location), group)
+
+    def base(self, players) -> float:
+        """与位置无关的得分: 身价与特点"""
+        try:
+            worth = players.worth_in() or 0.0
+        except ValueError:
+            worth = 0.0
+        ability = players.ability or dict()
+        strengths = len(traits.split_traits(ability.get(traits.AbilityAttr.STRENGTHS)))
+        weaknesses = len(traits.split_traits(ability.get(traits.AbilityAttr.WEAKNESSES)))
+        return self.worth_weight * worth / 1e7 + self.trait_weight * (strengths - weaknesses)
+
+    def position_fit(self, players_group, group) -> float:
+        """球员分组打在位置分组上的适配得分"""
+        if (players_group == GOALKEEPER) != (group == GOALKEEPER):
+            return self.goalkeeper_mismatch
+        return self.fit.get((players_group, group), self.mismatch)
+
+
+def hungarian(cost) -> list:
+    """匈牙利算法(带势函数的最短增广路, O(n^2 m)); 求n行m列(n <= m)代价矩阵的最小代价完全匹配
+
+    :param cost: 代价矩阵, n个长度为m的序列
+    :return: 每一行匹配的列下标
+    """
+    n, m = len(cost), len(cost[0]) if cost else 0
+    if n > m:
+        raise ValueError(f"cost matrix has more rows ({n}) than columns ({m})")
+    inf = float("inf")
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    # match[j]: 第j列匹配的行(从1开始, 0表示未匹配); 第0列为增广路的虚拟起点
+    match, way = [0] * (m + 1), [0] * (m + 1)
+    for row in range(1, n + 1):
+        match[0], column = row, 0
+        shortest, used = [inf] * (m + 1), [False] * (m + 1)
+        while True:
+            used[column] = True
+            current = match[column]
+            costs, potential = cost[current - 1], u[current]
+            delta, nearest = inf, 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                reduced = costs[j - 1] - potential - v[j]
+                if reduced < shortest[j]:
+                    shortest[j], way[j] = reduced, column
+                if shortest[j] < delta:
+                    delta, nearest = shortest[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    shortest[j] -= delta
+            column = nearest
+            if match[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            assignment[match[j] - 1] = j - 1
+    return assignment
+
+
+class _Candidates(object):
+    """球员在各位置分组上的得分; 同一批球员评估多个阵型时只计算一次"""
+
+    def __init__(self, players, scorer):
+        self.players = list({id(p): p for p in players}.values())
+        self.scores = {group: [scorer(p, group) for p in self.players] for group in GROUPS}
+
+    def top(self, group, k) -> list:
+        return heapq.nlargest(k, range(len(self.players)), key=self.scores[group].__getitem__)
+
+
+def _slots(formation) -> list:
+    guard, midfield, forward = formation
+    if guard + midfield + forward != 10 or min(formation) < 0:
+        raise ValueError("The parameter value is unreasonable. The total number should be 10")
+    return ["后卫"] * guard + ["中场"] * midfield + ["前锋"] * forward + [GOALKEEPER]
+
+
+def _solve(candidates, formation) -> Lineup:
+    slots = _slots(formation)
+    if len(candidates.players) < len(slots):
+        raise AttributeError("The current number of players is less than 11")
+    # 某分组的位置只可能由该分组得分最高的11名球员之一担任: 其他10个位置之外至少还有一名更优的空闲球员
+    pool = sorted({index for group in set(slots) for index in candidates.top(group, len(slots))})
+    cost = [[-candidates.scores[group][index] for index in pool] for group in slots]
+    assignment = hungarian(cost)
+    chosen = [pool[column] for column in assignment]
+    score = sum(candidates.scores[group][index] for group, index in zip(slots, chosen))
+    return Lineup(tuple(formation), score, [candidates.players[index] for index in chosen], slots)
+
+
+def solve(players, formation=(4, 4, 2), scorer=None) -> Lineup:
+    """为阵型选出总得分最高的11名球员并分配位置(精确解, 匈牙利算法)
+
+    :param players: 球员列表; 同一球员对象只考虑一次
+    :param formation: (后卫, 中场, 前锋), 三者之和为10, 另有1名守门员
+    :param scorer: 得分函数(players, 位置分组) -> float, 默认Scorer()
+    """
+    return _solve(_Candidates(players, scorer or Scorer()), formation)
+
+
+def best_formation(players, formations=FORMATIONS, scorer=None) -> Lineup:
+    """评估所有阵型并返回总得分最高的阵容; 球员得分只计算一次"""
+    candidates = _Candidates(players, scorer or Scorer())
+    return max((_solve(candidates, formation) for formation in formations), key=lambda lineup_: lineup_.score)
+
+
+if __name__ == '__main__':
+    import timeit
+    import character
+    import club
+    from basedata import PLAYERS_DATABASE
+
+    roster = [character.Players(f"{name}#{i}", **attrs)
+              for i in range(50) for name, attrs in PLAYERS_DATABASE.items()]
+    team = club.Club("benchmark", players=list(roster))
+
+    def shuffle_lineup(players, guard=4, midfield=4, forward=2):
+        lineup_ = list()
+        for locations, quantity in zip(GROUPS.values(), [guard, midfield, forward, 1]):
+            random.shuffle(players)
+            selected = list()
+            for p in players:
+                if len(selected) >= quantity:
+                    break
+                if p.location in locations:
+                    selected.append(p)
+            lineup_.extend(selected)
+        return lineup_
+
+    for label, func in (
+            ("shuffle roster", lambda: shuffle_lineup(list(roster))),
+            ("PositionBuckets", lambda: team.starting_lineup()),
+    ):
+        seconds = min(timeit.repeat(func, number=20, repeat=3)) / 20
+        print(f"{label:<18}{seconds * 1e6:10.1f} us per starting_lineup ({len(roster)} players)")
+
+    # 一个赛季的比赛: 主种子派生每场比赛的种子, 并行与串行的结果完全一致
+    from concurrent.futures import ThreadPoolExecutor
+    season_seed = 2023
+    matches = [(matchday, match) for matchday in range(1, 39) for match in range(10)]
+
+    def play(key):
+        return [p.ch_name for p in team.starting_lineup(seed=derive_seed(season_seed, *key))]
+
+    state = random.getstate()
+    sequential = [play(key) for key in matches]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        parallel = list(pool.map(play, matches))
+    print(f"{len(matches)} matches reproducible in parallel: {sequential == parallel}, "
+          f"global random state untouched: {random.getstate() == state}")
+
+    # 联赛每轮: 20个俱乐部各评估所有阵型
+    import time
+    league = [club.Club(f"club#{i}", players=roster[i * 30:i * 30 + 30]) for i in range(20)]
+    start = time.perf_counter()
+    best = [best_formation(club_.players) for club_ in league]
+    elapsed = time.perf_counter() - start
+    print(f"best formation for {len(league)} clubs x {len(FORMATIONS)} formations: {elapsed * 1000:.1f} ms "
+          f"(e.g. {best[0].formation}, score {best[0].score:.2f})")
+
+    # 匈牙利算法与穷举一致(整数代价, 比较最小总代价)
+    from itertools import permutations
+    rng_ = random.Random(0)
+    for _ in range(300):
+        n, m = rng_.randint(1, 4), rng_.randint(4, 6)
+        cost = [[rng_.randint(-9, 9) for _ in range(m)] for _ in range(n)]
+        assignment = hungarian(cost)
+        assert len(set(assignment)) == n
+        assert sum(cost[row][column] for row, column in enumerate(assignment)) == min(
+            sum(cost[row][column] for row, column in enumerate(columns)) for columns in permutations(range(m), n))
+
+    # 每个分组只保留得分最高的11名球员后的解与不剪枝(全部球员参与匹配)的解得分一致
+    def unpruned(players, formation):
+        candidates = _Candidates(players, Scorer())
+        slots = _slots(formation)
+        cost = [[-score for score in candidates.scores[group]] for group in slots]
+        return sum(candidates.scores[group][index] for group, index in zip(slots, hungarian(cost)))
+
+    # 30人的阵容几乎不被剪枝, 另取300名球员使剪枝生效
+    for players in [club_.players for club_ in league[:5]] + [roster[:300]]:
+        for formation in FORMATIONS:
+            assert abs(solve(players, formation).score - unpruned(players, formation)) < 1e-9
+    print("hungarian matches brute force, pruned solves match unpruned")
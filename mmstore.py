@@ -0,0 +1,295 @@
+import os
+import json
+import mmap
+import shutil
+import struct
+import hashlib
+import tempfile
+from array import array
+from collections.abc import Mapping
+import character
+import parsers
+from character import PlayersAttr
+
+MAGIC = b"WFMMAP"
+VERSION = 2
+
+# 以字符串形式保存在字符串堆中的字段; ability/honour以json保存
+STRING_FIELDS = (
+    PlayersAttr.CH_NAME, PlayersAttr.EN_NAME, PlayersAttr.BIRTHDAY, PlayersAttr.HEIGHT,
+    PlayersAttr.NATIONALITY, PlayersAttr.PREFERRED_FOOT, PlayersAttr.TEAM, PlayersAttr.NUMBER,
+    PlayersAttr.LOCATION, PlayersAttr.WORTH, PlayersAttr.ABILITY, PlayersAttr.HONOUR,
+)
+JSON_FIELDS = (PlayersAttr.ABILITY, PlayersAttr.HONOUR)
+# 定长数值列: (列名, array类型码)
+NUMERIC_COLUMNS = (
+    (PlayersAttr.AGE, "h"), (PlayersAttr.NUMBER, "h"), (PlayersAttr.HEIGHT, "f"), (PlayersAttr.WORTH, "d"),
+)
+# 每行的属性存在位图(uint16): 第j位对应STRING_FIELDS[j], 最后一位对应age; 缺失(或为None)的属性读取时不返回
+PRESENT_FIELDS = STRING_FIELDS + (PlayersAttr.AGE,)
+SECTIONS = tuple(name for name, _ in NUMERIC_COLUMNS) + ("present", "offsets", "ch_index", "en_index", "heap")
+
+# magic, version, 行数, 去重后的中文名数量, 索引槽数, 各分区起始偏移
+_HEADER = struct.Struct(f"<6sHQQQ{len(SECTIONS)}Q")
+_ALIGN = 8
+_EMPTY = 0
+
+
+class StoreError(Exception):
+    """存储文件格式错误时抛出"""
+
+
+def key_hash(key: str) -> int:
+    """返回名字的64位稳定哈希; 跨进程、跨版本一致"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def write_store(path, records) -> int:
+    """将球员记录写入内存映射存储文件; 记录逐条处理, 字符串堆写入临时文件, 不在内存中保留记录
+
+    文件布局(各分区8字节对齐):
+        header | age(int16) | number(int16) | height(float32) | worth(float64) | present(uint16)
+        | offsets(uint64, 行数*字段数+1) | ch_name哈希索引(uint32) | en_name哈希索引(uint32) | 字符串堆
+    第i行第j个字段位于 heap[offsets[i*F+j]:offsets[i*F+j+1]]; 索引槽保存"行号+1", 0表示空槽.
+    中文名重复时后写入的记录覆盖之前的索引项. 缺失或为None的属性在present中对应位为0, 读取时不返回
+
+    :param path: 输出路径
+    :param records: (中文名, 属性字典)序列, 与PLAYERS_DATABASE.items()结构一致
+    :return: 写入行数
+    """
+    columns = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS}
+    present = array("H")
+    offsets = array("Q", [0])
+    ch_hashes, en_hashes = array("Q"), array("Q")
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryFile(dir=directory) as heap:
+        position = 0
+        for name, attrs in records:
+            attrs = dict(attrs, ch_name=name)
+            age = parsers.parse_age(attrs.get(PlayersAttr.AGE))
+            number = parsers.parse_number(attrs.get(PlayersAttr.NUMBER))
+            height = parsers.parse_height(attrs.get(PlayersAttr.HEIGHT))
+            worth, _ = parsers.parse_worth(attrs.get(PlayersAttr.WORTH))
+            columns[PlayersAttr.AGE].append(-1 if age is None else age)
+            columns[PlayersAttr.NUMBER].append(-1 if number is None else number)
+            columns[PlayersAttr.HEIGHT].append(float("nan") if height is None else height)
+            columns[PlayersAttr.WORTH].append(float("nan") if worth is None else worth)
+            present.append(sum(1 << bit for bit, field in enumerate(PRESENT_FIELDS)
+                               if attrs.get(field) is not None))
+            for field in STRING_FIELDS:
+                value = attrs.get(field)
+                if value is None:
+                    data = b""
+                elif field in JSON_FIELDS:
+                    data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                else:
+                    data = str(value).encode("utf-8")
+                heap.write(data)
+                position += len(data)
+                offsets.append(position)
+            ch_hashes.append(key_hash(name))
+            en_hashes.append(key_hash(attrs.get(PlayersAttr.EN_NAME) or ""))
+
+        rows = len(ch_hashes)
+        slots = 8
+        while slots < rows * 2:
+            slots *= 2
+        ch_index, unique = _build_index(ch_hashes, slots)
+        en_index, _ = _build_index(en_hashes, slots)
+        blobs = [columns[name] for name, _ in NUMERIC_COLUMNS] + [present, offsets, ch_index, en_index]
+
+        section_offsets, cursor = list(), _align(_HEADER.size)
+        for blob in blobs:
+            section_offsets.append(cursor)
+            cursor = _align(cursor + len(blob) * blob.itemsize)
+        section_offsets.append(cursor)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, rows, unique, slots, *section_offsets))
+            for blob, start in zip(blobs, section_offsets):
+                f.write(b"\0" * (start - f.tell()))
+                blob.tofile(f)
+            f.write(b"\0" * (section_offsets[-1] - f.tell()))
+            heap.seek(0)
+            shutil.copyfileobj(heap, f)
+        os.replace(tmp_path, path)
+    return rows
+
+
+def _align(position):
+    return (position + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _build_index(hashes, slots):
+    index, mask, unique = array("I", bytes(4 * slots)), slots - 1, 0
+    for row, value in enumerate(hashes):
+        slot = value & mask
+        while index[slot] != _EMPTY and hashes[index[slot] - 1] != value:
+            slot = (slot + 1) & mask
+        if index[slot] == _EMPTY:
+            unique += 1
+        index[slot] = row + 1
+    return index, unique
+
+
+class PlayerStore(Mapping):
+    """ 内存映射球员存储; 数值列为定长数组, 字符串及嵌套属性保存在字符串堆中,
+    通过ch_name/en_name哈希索引定位, 一次查找只访问少量页面
+
+    与PLAYERS_DATABASE的用法一致, 可直接用于构建Players与Club:
+
+    Used:
+        write_store("players.wfm", PLAYERS_DATABASE.items())
+        with PlayerStore("players.wfm") as store:
+            p = Players("德赫亚", **store.get("德赫亚"))
+            store.get_by_en_name("David De Gea Quintana")
+            # 定长数值列(memoryview), 可直接交给numpy.frombuffer
+            store.column(PlayersAttr.WORTH)
+    """
+
+    def __init__(self, path):
+        self.__views = list()
+        self.__buffer = None
+        self.__file = open(path, "rb")
+        try:
+            self.__buffer = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.close()
+            raise StoreError(f"empty store file: {path}") from None
+        header = _HEADER.unpack_from(self.__buffer, 0)
+        magic, version, self.__rows, self.__unique, self.__slots = header[:5]
+        if magic != MAGIC:
+            self.close()
+            raise StoreError(f"not a player store file: {path}")
+        if version != VERSION:
+            self.close()
+            raise StoreError(f"unsupported store version: {version}")
+        self.__sections = dict(zip(SECTIONS, header[5:]))
+        view = memoryview(self.__buffer)
+        self.__columns = dict()
+        for name, typecode in NUMERIC_COLUMNS:
+            start = self.__sections[name]
+            self.__columns[name] = view[start:start + self.__rows * struct.calcsize(typecode)].cast(typecode)
+        start = self.__sections["present"]
+        self.__present = view[start:start + self.__rows * 2].cast("H")
+        start = self.__sections["offsets"]
+        self.__offsets = view[start:start + (self.__rows * len(STRING_FIELDS) + 1) * 8].cast("Q")
+        self.__indexes = dict()
+        for field, section in ((PlayersAttr.CH_NAME, "ch_index"), (PlayersAttr.EN_NAME, "en_index")):
+            start = self.__sections[section]
+            self.__indexes[field] = view[start:start + self.__slots * 4].cast("I")
+        self.__heap = self.__sections["heap"]
+        self.__views = [*self.__columns.values(), self.__present, self.__offsets, *self.__indexes.values(), view]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(rows={self.__rows})"
+
+    def __getitem__(self, name):
+        row = self.find(name)
+        if row is None:
+            raise KeyError(name)
+        return self.record(row)
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def __iter__(self):
+        for row in range(self.__rows):
+            name = self._field(row, 0)
+            if self.find(name) == row:
+                yield name
+
+    def __len__(self):
+        return self.__unique
+
+    @property
+    def rows(self) -> int:
+        """返回文件中的总行数(含被覆盖的重复中文名)"""
+        return self.__rows
+
+    def close(self):
+        """释放内存映射与文件句柄"""
+        for view in self.__views:
+            view.release()
+        self.__views = list()
+        if self.__buffer is not None:
+            self.__buffer.close()
+            self.__buffer = None
+        self.__file.close()
+
+    def find(self, key: str, by=PlayersAttr.CH_NAME):
+        """根据ch_name或en_name查找行号; 不存在时返回None"""
+        index = self.__indexes.get(by)
+        if index is None:
+            raise ValueError(f"{self.__class__.__name__} has no index on '{by}'")
+        field = STRING_FIELDS.index(by)
+        mask = self.__slots - 1
+        slot = key_hash(key) & mask
+        while True:
+            row = index[slot]
+            if row == _EMPTY:
+                return None
+            if self._field(row - 1, field) == key:
+                return row - 1
+            slot = (slot + 1) & mask
+
+    def get_by_en_name(self, en_name: str, default=None):
+        """根据英文名返回球员属性字典(不含ch_name)"""
+        row = self.find(en_name, by=PlayersAttr.EN_NAME)
+        return default if row is None else self.record(row)
+
+    def record(self, row: int) -> dict:
+        """返回第row行的属性字典, 结构与PLAYERS_DATABASE中的值一致; 原记录中缺失的属性不包含在内
+        (age以整数返回)"""
+        if not 0 <= row < self.__rows:
+            raise IndexError(row)
+        attrs, present = dict(), self.__present[row]
+        for field_index, field in enumerate(STRING_FIELDS[1:], start=1):
+            if not present >> field_index & 1:
+                continue
+            value = self._field(row, field_index)
+            attrs[field] = json.loads(value) if field in JSON_FIELDS else value
+        age = self.__columns[PlayersAttr.AGE][row]
+        if present >> len(STRING_FIELDS) & 1 and age >= 0:
+            attrs[PlayersAttr.AGE] = age
+        return attrs
+
+    def players(self, name: str) -> character.Players:
+        """根据中文名构建Players对象"""
+        return character.Players(name, **self[name])
+
+    def column(self, name):
+        """返回定长数值列(memoryview); 缺失值: 整数列为-1, 浮点列为nan"""
+        return self.__columns[name]
+
+    def _field(self, row, field_index):
+        position = row * len(STRING_FIELDS) + field_index
+        start, end = self.__offsets[position], self.__offsets[position + 1]
+        return self.__buffer[self.__heap + start:self.__heap + end].decode("utf-8")
+
+
+if __name__ == '__main__':
+    import time
+    from basedata import PLAYERS_DATABASE
+
+    path = os.path.join(tempfile.gettempdir(), "players.wfm")
+    replicas = 1000
+    records = ((f"{name}#{i}", attrs) for i in range(replicas) for name, attrs in PLAYERS_DATABASE.items())
+    start = time.perf_counter()
+    rows = write_store(path, records)
+    print(f"wrote {rows} rows ({os.path.getsize(path) / 2 ** 20:.1f} MiB) "
+          f"in {time.perf_counter() - start:.2f}s")
+    with PlayerStore(path) as store:
+        start = time.perf_counter()
+        for i in range(10000):
+            store.get(f"克里斯蒂亚诺·罗纳尔多#{i % replicas}")
+        print(f"lookup: {(time.perf_counter() - start) / 10000 * 1e6:.1f} us/op")
+        print(store.players("克里斯蒂亚诺·罗纳尔多#42"), store.get_by_en_name("David De Gea Quintana"))
+    os.remove(path)
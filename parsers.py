@@ -0,0 +1,121 @@
+import re
+import datetime
+from functools import lru_cache
+from collections import namedtuple
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_DATE = re.compile(r"^\s*(\d{4})-(\d{1,2})-(\d{1,2})\s*$")
+_WORTH = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*(亿|万)?\s*(\D*?)\s*$")
+
+# 身价数量单位
+UNITS = {"": 1, "万": 10 ** 4, "亿": 10 ** 8}
+
+
+def parse_worth(text):
+    """解析球员身价; "3600万英镑" -> (36000000.0, "英镑")
+
+    无法解析时返回(None, "")
+    """
+    if isinstance(text, (int, float)):
+        return float(text), ""
+    match = _WORTH.match(text or "")
+    if not match:
+        return None, ""
+    amount, unit, currency = match.groups()
+    return float(amount) * UNITS[unit or ""], currency
+
+
+def parse_height(text):
+    """解析身高; "187 cm" / "177" -> 187.0 / 177.0, 无法解析时返回None"""
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _NUMBER.search(text or "")
+    return float(match.group()) if match else None
+
+
+def parse_number(text):
+    """解析球衣号码; "7  " -> 7, 空号码返回None"""
+    if isinstance(text, int):
+        return text
+    text = (text or "").strip()
+    return int(text) if text.isdigit() else None
+
+
+def parse_age(value):
+    """解析年龄; 37 / "64" -> 37 / 64, 无法解析时返回None"""
+    if isinstance(value, int):
+        return value
+    value = str(value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(text: str):
+    match = _DATE.match(text)
+    if not match:
+        return None
+    try:
+        return datetime.date(*map(int, match.groups()))
+    except ValueError:
+        return None
+
+
+def parse_date(value):
+    """解析日期; "1990-11-07" / date / datetime -> datetime.date
+    只有年份("1878")或无法解析时返回None; 解析结果按字符串缓存
+    """
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if not isinstance(value, str):
+        return None
+    return _parse_date(value)
+
+
+def age_on(birthday, as_of) -> int:
+    """返回出生日期为birthday的人在as_of当天的周岁; 两者均为datetime.date"""
+    return as_of.year - birthday.year - ((as_of.month, as_of.day) < (birthday.month, birthday.day))
+
+
+def parse_honour_count(value) -> int:
+    """解析荣誉次数; "4次" / "1" / 2 -> 4 / 1 / 2
+    荣誉列表中出现但没有写明次数的记为1次
+    """
+    if isinstance(value, int):
+        return value
+    match = _NUMBER.search(str(value or ""))
+    return int(float(match.group())) if match else 1
+
+
+# 汇率配置: 1单位货币 = RATES[货币] 单位BASE_CURRENCY; 可直接修改或在换算时传入自定义汇率
+BASE_CURRENCY = "英镑"
+RATES = {"英镑": 1.0, "欧元": 0.86, "美元": 0.79, "人民币": 0.11}
+
+
+class Valuation(namedtuple("Valuation", ["amount", "currency", "text"])):
+    """解析后的身价; amount为货币单位数值, currency为货币名称, text为原始字符串"""
+    __slots__ = ()
+
+    def to(self, currency=BASE_CURRENCY, rates=None) -> float:
+        """换算为指定货币的数值"""
+        return convert(self.amount, self.currency, currency, rates)
+
+
+def parse_valuation(text):
+    """解析身价为Valuation; 无法解析时返回None, 未写明货币时视为BASE_CURRENCY"""
+    amount, currency = parse_worth(text)
+    if amount is None:
+        return None
+    return Valuation(amount, currency or BASE_CURRENCY, text)
+
+
+def convert(amount: float, currency: str, target=BASE_CURRENCY, rates=None) -> float:
+    """货币换算; 汇率未配置时抛出ValueError"""
+    if currency == target:
+        return amount
+    rates = RATES if rates is None else rates
+    for name in (currency, target):
+        if name not in rates:
+            raise ValueError(f"no exchange rate configured for currency: '{name}'")
+    return amount * rates[currency] / rates[target]
@@ -0,0 +1,195 @@
+import operator
+import character
+from character import PlayersAttr
+from schema import AttrSchema
+
+_SCHEMA = AttrSchema.of(PlayersAttr)
+
+
+class Predicate(object):
+    """ 球员查询条件; 由Attr的比较运算生成, 可以用 & | ~ 组合
+    条件在第一次使用时编译为闭包(属性读取使用operator.attrgetter), 之后重复使用不再编译
+
+    Used:
+        young_forward = Attr(PlayersAttr.LOCATION).isin(["中锋", "前锋"]) & Attr(PlayersAttr.AGE).between(18, 23)
+        english = Attr(PlayersAttr.NATIONALITY) == "英格兰"
+        list(club.select(young_forward | english))
+        # 普通球员列表同样可以查询
+        list(select(players, ~english))
+    """
+    __slots__ = ("_build", "_hint", "_compiled")
+
+    def __init__(self, build, hint=None):
+        """
+        :param build: 无参函数, 返回编译后的判断函数 players -> bool
+        :param hint: 可以使用哈希索引的等值条件(属性名, 属性值)
+        """
+        self._build = build
+        self._hint = hint
+        self._compiled = None
+
+    def __call__(self, players) -> bool:
+        return self.compile()(players)
+
+    def __and__(self, other):
+        return Predicate(lambda: _all_of(self.compile(), other.compile()), self._hint or other._hint)
+
+    def __or__(self, other):
+        return Predicate(lambda: _any_of(self.compile(), other.compile()))
+
+    def __invert__(self):
+        return Predicate(lambda: _not(self.compile()))
+
+    def compile(self):
+        """返回编译后的判断函数; 只编译一次"""
+        if self._compiled is None:
+            self._compiled = self._build()
+        return self._compiled
+
+    @property
+    def hint(self):
+        """返回(属性名, 属性值)形式的等值条件; 所有匹配的球员都必须满足该条件, 没有时返回None"""
+        return self._hint
+
+
+class Attr(object):
+    """ 球员属性; 比较运算返回Predicate
+
+    :param name: 属性名, PlayersAttr中的属性或球员对象的其他属性(如"valuation.amount", 中间值为None时视为None)
+    :param convert: 比较前对属性值的转换, 如parsers.parse_height
+    """
+    __slots__ = ("name", "getter", "convert")
+
+    def __init__(self, name: str, convert=None):
+        root = name.split(".")[0]
+        if root not in _SCHEMA and not hasattr(character.Players, root):
+            raise ValueError(
+                f"{character.Players.__name__} object not attribute: '{name}'"
+            )
+        self.name = name
+        self.convert = convert
+        getter = operator.attrgetter(name) if "." not in name else _path_getter(name)
+        self.getter = getter if convert is None else (lambda players: convert(getter(players)))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name!r})"
+
+    def __eq__(self, value):
+        hint = (self.name, value) if self.convert is None and "." not in self.name else None
+        return self._compare(operator.eq, value, hint)
+
+    def __ne__(self, value):
+        return self._compare(operator.ne, value)
+
+    def __lt__(self, value):
+        return self._order(operator.lt, value)
+
+    def __le__(self, value):
+        return self._order(operator.le, value)
+
+    def __gt__(self, value):
+        return self._order(operator.gt, value)
+
+    def __ge__(self, value):
+        return self._order(operator.ge, value)
+
+    __hash__ = None
+
+    def isin(self, values):
+        """属性值属于values"""
+        getter, values = self.getter, frozenset(values)
+        return Predicate(lambda: lambda players: getter(players) in values)
+
+    def between(self, low=None, high=None):
+        """low <= 属性值 <= high; 省略的一端不限制, 属性值为None或无法比较时不匹配"""
+        getter = self.getter
+
+        def build():
+            def match(players):
+                value = getter(players)
+                try:
+                    return (low is None or low <= value) and (high is None or value <= high)
+                except TypeError:
+                    return False
+            return match
+        return Predicate(build)
+
+    def contains(self, value):
+        """属性值(字符串/字典/列表)中包含value, 如荣誉字典中包含某个奖项"""
+        getter = self.getter
+        return Predicate(lambda: lambda players: value in (getter(players) or ()))
+
+    def _compare(self, op, value, hint=None):
+        getter = self.getter
+        return Predicate(lambda: lambda players: op(getter(players), value), hint)
+
+    def _order(self, op, value):
+        getter = self.getter
+
+        def build():
+            def match(players):
+                try:
+                    return op(getter(players), value)
+                except TypeError:
+                    return False
+            return match
+        return Predicate(build)
+
+
+def _path_getter(name):
+    """返回按属性路径(如valuation.amount)读取的函数; 中间值为None时返回None"""
+    getters = [operator.attrgetter(part) for part in name.split(".")]
+
+    def getter(players):
+        value = players
+        for get in getters:
+            if value is None:
+                return None
+            value = get(value)
+        return value
+    return getter
+
+
+def _all_of(left, right):
+    return lambda players: left(players) and right(players)
+
+
+def _any_of(left, right):
+    return lambda players: left(players) or right(players)
+
+
+def _not(inner):
+    return lambda players: not inner(players)
+
+
+def select(players, predicate: Predicate):
+    """按顺序惰性返回players中满足predicate的球员"""
+    match = predicate.compile()
+    return (players_ for players_ in players if match(players_))
+
+
+if __name__ == '__main__':
+    import timeit
+    import club
+    from basedata import PLAYERS_DATABASE
+
+    names = list(PLAYERS_DATABASE)
+    roster = [character.Players(f"{names[i % len(names)]}#{i}", **PLAYERS_DATABASE[names[i % len(names)]])
+              for i in range(100000)]
+    team = club.Club("benchmark", players=roster)
+
+    def eval_loop(by, value):
+        return [players for players in roster if eval(f"players.{by}") == value]
+
+    nationality = Attr(PlayersAttr.NATIONALITY) == "英格兰"
+    combined = (Attr(PlayersAttr.LOCATION).isin(["中锋", "前锋", "左边锋", "右边锋"])
+                & Attr(PlayersAttr.AGE).between(18, 25)) | nationality
+
+    for label, func in (
+            ("eval loop (nationality)", lambda: eval_loop(PlayersAttr.NATIONALITY, "英格兰")),
+            ("select (nationality)", lambda: list(select(roster, nationality))),
+            ("club.select (indexed)", lambda: list(team.select(nationality))),
+            ("select (and/or/in/range)", lambda: list(select(roster, combined))),
+    ):
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"{label:<26}{seconds * 1000:9.1f} ms  {len(func())} matches in {len(roster)} players")
@@ -0,0 +1,79 @@
+from copy import copy
+import character
+
+
+class PlayersRegistry(object):
+    """ 球员身份映射; 每个球员(以中文名区分)只保留一个规范实例,
+    俱乐部、阵容和模拟之间共享同一对象而不是各自构建或复制
+
+    Used:
+        registry = PlayersRegistry(PLAYERS_DATABASE)
+        p = registry.get("德赫亚")
+        p is registry.get("德赫亚")   # True
+        # 阵容中需要修改某个球员时, 使用写时复制, 规范实例不受影响
+        lineup = club.starting_lineup()
+        copy_on_write(lineup, lineup[0], by=PlayersAttr.AGE, value=33)
+    """
+
+    def __init__(self, database=None, factory=character.Players):
+        """
+        :param database: PLAYERS_DATABASE结构的映射, 首次访问某球员时据此构建实例
+        :param factory: 构建球员实例的类型, 如character.Players或compact.CompactPlayers
+        """
+        self.__database = database if database is not None else dict()
+        self.__factory = factory
+        self.__instances = dict()
+
+    def __len__(self):
+        return len(self.__instances)
+
+    def __contains__(self, ch_name):
+        return ch_name in self.__instances or ch_name in self.__database
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(instances={len(self.__instances)})"
+
+    def get(self, ch_name: str, default=None):
+        """返回球员的规范实例; 首次访问时根据database构建, 不存在时返回default"""
+        players = self.__instances.get(ch_name)
+        if players is not None:
+            return players
+        attrs = self.__database.get(ch_name)
+        if attrs is None:
+            return default
+        players = self.__instances[ch_name] = self.__factory(ch_name, **attrs)
+        return players
+
+    def get_many(self, names) -> list:
+        """按顺序返回多个球员的规范实例; 不存在的球员抛出KeyError"""
+        result = list()
+        for ch_name in names:
+            players = self.get(ch_name)
+            if players is None:
+                raise KeyError(ch_name)
+            result.append(players)
+        return result
+
+    def register(self, players):
+        """登记球员实例; 同名球员已登记时返回已有的规范实例"""
+        return self.__instances.setdefault(players.ch_name, players)
+
+    def discard(self, ch_name: str):
+        """移除已登记的实例; 之后的get会重新构建"""
+        self.__instances.pop(ch_name, None)
+
+
+def copy_on_write(lineup: list, players, by=character.PlayersAttr.CH_NAME, value=None):
+    """在阵容中用修改后的副本替换players(按对象身份匹配); 原球员及其他引用不受影响
+
+    :param lineup: 球员引用列表, 如starting_lineup()的返回值
+    :param players: 阵容中需要修改的球员
+    :return: 修改后的副本
+    """
+    for index, item in enumerate(lineup):
+        if item is players:
+            clone = copy(players)
+            clone.modify(by=by, value=value)
+            lineup[index] = clone
+            return clone
+    raise ValueError(f"{players!r} is not in lineup")
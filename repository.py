@@ -0,0 +1,319 @@
+import json
+import sqlite3
+from itertools import islice
+import club
+import character
+import parsers
+from character import PlayersAttr, CoachAttr
+from club import ClubAttr
+
+# 属性列不声明类型(不做类型转换), 读取时与写入的值完全一致; worth_value/age_value为解析后的数值, 用于范围查询
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    ch_name        TEXT PRIMARY KEY,
+    en_name,
+    age,
+    age_value      INTEGER,
+    birthday,
+    height,
+    nationality,
+    preferred_foot,
+    team,
+    number,
+    location,
+    worth,
+    worth_value    REAL,
+    ability,
+    honour
+);
+CREATE INDEX IF NOT EXISTS players_team ON players (team);
+CREATE INDEX IF NOT EXISTS players_location ON players (location);
+CREATE INDEX IF NOT EXISTS players_nationality ON players (nationality);
+CREATE INDEX IF NOT EXISTS players_worth ON players (worth_value);
+CREATE INDEX IF NOT EXISTS players_age ON players (age_value);
+
+CREATE TABLE IF NOT EXISTS coaches (
+    ch_name     TEXT PRIMARY KEY,
+    en_name,
+    age,
+    birthday,
+    height,
+    nationality,
+    team,
+    location,
+    honour
+);
+CREATE INDEX IF NOT EXISTS coaches_team ON coaches (team);
+
+CREATE TABLE IF NOT EXISTS clubs (
+    name           TEXT PRIMARY KEY,
+    city           TEXT,
+    birthday       TEXT,
+    football_court TEXT,
+    league_matches TEXT,
+    honour         TEXT,
+    coach          TEXT
+);
+CREATE TABLE IF NOT EXISTS club_players (
+    club     TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    players  TEXT NOT NULL,
+    PRIMARY KEY (club, position)
+);
+"""
+
+# 版本0(没有age_value与club_players.position)的数据库升级到版本1
+_MIGRATE_V0 = """
+ALTER TABLE players ADD COLUMN age_value INTEGER;
+UPDATE players SET age_value = age WHERE typeof(age) = 'integer';
+DROP INDEX IF EXISTS players_age;
+ALTER TABLE club_players RENAME TO club_players_v0;
+CREATE TABLE club_players (
+    club     TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    players  TEXT NOT NULL,
+    PRIMARY KEY (club, position)
+);
+INSERT INTO club_players (club, position, players)
+    SELECT club, rowid, players FROM club_players_v0 ORDER BY rowid;
+DROP TABLE club_players_v0;
+"""
+
+_PLAYERS_COLUMNS = (
+    PlayersAttr.CH_NAME, PlayersAttr.EN_NAME, PlayersAttr.AGE, "age_value", PlayersAttr.BIRTHDAY,
+    PlayersAttr.HEIGHT, PlayersAttr.NATIONALITY, PlayersAttr.PREFERRED_FOOT, PlayersAttr.TEAM, PlayersAttr.NUMBER,
+    PlayersAttr.LOCATION, PlayersAttr.WORTH, "worth_value", PlayersAttr.ABILITY, PlayersAttr.HONOUR,
+)
+# 解析后的数值列; 只用于查询, 不还原为属性
+_VALUE_COLUMNS = ("age_value", "worth_value")
+_COACH_COLUMNS = (
+    CoachAttr.CH_NAME, CoachAttr.EN_NAME, CoachAttr.AGE, CoachAttr.BIRTHDAY, CoachAttr.HEIGHT,
+    CoachAttr.NATIONALITY, CoachAttr.TEAM, CoachAttr.LOCATION, CoachAttr.HONOUR,
+)
+_JSON_COLUMNS = (PlayersAttr.ABILITY, PlayersAttr.HONOUR)
+
+_INSERT_PLAYERS = (f"INSERT OR REPLACE INTO players ({', '.join(_PLAYERS_COLUMNS)}) "
+                   f"VALUES ({', '.join('?' * len(_PLAYERS_COLUMNS))})")
+_INSERT_COACH = (f"INSERT OR REPLACE INTO coaches ({', '.join(_COACH_COLUMNS)}) "
+                 f"VALUES ({', '.join('?' * len(_COACH_COLUMNS))})")
+_SELECT_PLAYERS = f"SELECT {', '.join(_PLAYERS_COLUMNS)} FROM players"
+_SELECT_COACH = f"SELECT {', '.join(_COACH_COLUMNS)} FROM coaches"
+
+
+class Repository(object):
+    """ 基于sqlite3的球员/教练/俱乐部存储; 多个服务可共享同一个数据库文件
+
+    Used:
+        with Repository("football.db") as repo:
+            repo.import_database(PLAYERS_DATABASE, COACH_DATABASE)
+            repo.get_players("德赫亚")
+            # 曼联身价不低于5000万英镑的中场
+            repo.query_players(team="曼彻斯特联", location=["中场", "前腰"], min_worth=5e7)
+            repo.save_club(club)
+            repo.get_club("曼彻斯特联")
+    """
+
+    def __init__(self, path=":memory:", batch_size=1000):
+        """
+        :param path: 数据库文件路径; 默认使用内存数据库
+        :param batch_size: 批量写入时每批的记录数
+        """
+        self.__conn = sqlite3.connect(path)
+        self._migrate()
+        self.__batch_size = batch_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """关闭数据库连接"""
+        self.__conn.close()
+
+    def _migrate(self):
+        """创建表结构; 旧版本的数据库先升级到SCHEMA_VERSION"""
+        version = self.__conn.execute("PRAGMA user_version").fetchone()[0]
+        existing = self.__conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'players'").fetchone()
+        if existing and version < 1:
+            self.__conn.executescript(f"BEGIN; {_MIGRATE_V0} COMMIT;")
+        self.__conn.executescript(SCHEMA)
+        self.__conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def add_players(self, players) -> int:
+        """批量写入球员; 同名球员覆盖旧记录, 返回写入数量"""
+        return self._insert_batches(_INSERT_PLAYERS, (_players_row(p) for p in players))
+
+    def add_coaches(self, coaches) -> int:
+        """批量写入教练; 同名教练覆盖旧记录, 返回写入数量"""
+        return self._insert_batches(_INSERT_COACH, (_coach_row(c) for c in coaches))
+
+    def import_database(self, players_database=None, coach_database=None):
+        """导入PLAYERS_DATABASE/COACH_DATABASE结构的映射"""
+        if players_database:
+            self.add_players(character.Players(name, **attrs) for name, attrs in players_database.items())
+        if coach_database:
+            self.add_coaches(character.Coach(name, **attrs) for name, attrs in coach_database.items())
+
+    def save_club(self, club_: club.Club):
+        """保存俱乐部及其教练和全部球员; 阵容按顺序保存, 同一球员在阵容中出现多次时每次出现都保存"""
+        coach = club_.coach
+        # 删除旧阵容与写入新阵容在同一个事务中完成, 任何一步失败时整体回滚
+        with self.__conn:
+            self.__conn.execute("DELETE FROM club_players WHERE club = ?", (club_.name,))
+            if coach:
+                self.__conn.execute(_INSERT_COACH, _coach_row(coach))
+            self.__conn.executemany(_INSERT_PLAYERS, (_players_row(p) for p in club_.players))
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO clubs (name, city, birthday, football_court, league_matches, honour, coach) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (club_.name, club_.city, club_.birthday, club_.football_court, club_.league_matches,
+                 _dumps(club_.honour), coach.ch_name if coach else None),
+            )
+            self.__conn.executemany(
+                "INSERT INTO club_players (club, position, players) VALUES (?, ?, ?)",
+                ((club_.name, position, p.ch_name) for position, p in enumerate(club_.players)),
+            )
+
+    def get_players(self, ch_name: str):
+        """根据中文名返回球员; 不存在时返回None"""
+        row = self.__conn.execute(f"{_SELECT_PLAYERS} WHERE ch_name = ?", (ch_name,)).fetchone()
+        return None if row is None else _players_from_row(row)
+
+    def get_coach(self, ch_name: str):
+        """根据中文名返回教练; 不存在时返回None"""
+        row = self.__conn.execute(f"{_SELECT_COACH} WHERE ch_name = ?", (ch_name,)).fetchone()
+        return None if row is None else _coach_from_row(row)
+
+    def get_club(self, name: str):
+        """返回俱乐部及其教练和全部球员; 不存在时返回None
+        阵容顺序与保存时一致, 多次出现的球员为同一个对象(与save_club之前的阵容相同)"""
+        row = self.__conn.execute(
+            "SELECT city, birthday, football_court, league_matches, honour, coach FROM clubs WHERE name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            return None
+        city, birthday, football_court, league_matches, honour, coach = row
+        loaded = {r[0]: _players_from_row(r) for r in self.__conn.execute(
+            f"{_SELECT_PLAYERS} WHERE ch_name IN (SELECT players FROM club_players WHERE club = ?)",
+            (name,),
+        )}
+        players = [loaded[ch_name] for ch_name, in self.__conn.execute(
+            "SELECT players FROM club_players WHERE club = ? ORDER BY position", (name,),
+        ) if ch_name in loaded]
+        description = {
+            ClubAttr.CITY: city,
+            ClubAttr.BIRTHDAY: birthday,
+            ClubAttr.FOOTBALL_COURT: football_court,
+            ClubAttr.LEAGUE_MATCHES: league_matches,
+            ClubAttr.HONOUR: json.loads(honour),
+            ClubAttr.PLAYERS: players,
+        }
+        if coach is not None:
+            description[ClubAttr.COACH] = self.get_coach(coach)
+        return club.Club(name, **description)
+
+    def query_players(self, team=None, location=None, nationality=None,
+                      min_worth=None, max_worth=None, min_age=None, max_age=None, limit=None) -> list:
+        """按条件查询球员, 所有条件取交集; team/location/nationality可传入单个值或值列表
+        身价以货币单位比较, 如 min_worth=5e7 表示5000万
+
+        :return: [Players, ...]
+        """
+        clauses, params = list(), list()
+        for column, value in ((PlayersAttr.TEAM, team), (PlayersAttr.LOCATION, location),
+                              (PlayersAttr.NATIONALITY, nationality)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        for clause, value in (("worth_value >= ?", min_worth), ("worth_value <= ?", max_worth),
+                              ("age_value >= ?", min_age), ("age_value <= ?", max_age)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = _SELECT_PLAYERS
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_players_from_row(row) for row in self.__conn.execute(sql, params)]
+
+    def _insert_batches(self, sql, rows) -> int:
+        total = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.__batch_size))
+            if not batch:
+                return total
+            with self.__conn:
+                self.__conn.executemany(sql, batch)
+            total += len(batch)
+
+
+def _dumps(value):
+    return json.dumps(value or dict(), ensure_ascii=False)
+
+
+def _dumps_column(value):
+    """属性缺失时保存为NULL, 以便读取时还原为缺失"""
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _players_row(players: character.Players):
+    desc = players.description()
+    worth, _ = parsers.parse_worth(desc.get(PlayersAttr.WORTH))
+    desc["worth_value"] = worth
+    desc["age_value"] = parsers.parse_age(desc.get(PlayersAttr.AGE))
+    for column in _JSON_COLUMNS:
+        desc[column] = _dumps_column(desc.get(column))
+    return tuple(desc.get(column) for column in _PLAYERS_COLUMNS)
+
+
+def _coach_row(coach: character.Coach):
+    desc = coach.description()
+    desc[CoachAttr.HONOUR] = _dumps_column(desc.get(CoachAttr.HONOUR))
+    return tuple(desc.get(column) for column in _COACH_COLUMNS)
+
+
+def _attrs_from_row(columns, row, json_columns) -> dict:
+    """将一行还原为属性字典; NULL列对应原对象上缺失的属性, 不传入构造函数"""
+    attrs = {column: value for column, value in zip(columns, row) if value is not None}
+    for column in json_columns:
+        if column in attrs:
+            attrs[column] = json.loads(attrs[column])
+    return attrs
+
+
+def _players_from_row(row):
+    attrs = _attrs_from_row(_PLAYERS_COLUMNS, row, _JSON_COLUMNS)
+    for column in _VALUE_COLUMNS:
+        attrs.pop(column, None)
+    return character.Players(attrs.pop(PlayersAttr.CH_NAME), **attrs)
+
+
+def _coach_from_row(row):
+    attrs = _attrs_from_row(_COACH_COLUMNS, row, (CoachAttr.HONOUR,))
+    return character.Coach(attrs.pop(CoachAttr.CH_NAME), **attrs)
+
+
+if __name__ == '__main__':
+    import time
+    from basedata import PLAYERS_DATABASE, COACH_DATABASE
+
+    with Repository() as repo:
+        start = time.perf_counter()
+        repo.add_players(character.Players(f"{name}#{i}", **attrs)
+                         for i in range(500) for name, attrs in PLAYERS_DATABASE.items())
+        repo.import_database(PLAYERS_DATABASE, COACH_DATABASE)
+        print(f"insert: {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        found = repo.query_players(team="曼彻斯特联", min_worth=5e7, max_age=30)
+        print(f"query: {(time.perf_counter() - start) * 1000:.2f} ms, {len(found)} players")
+        print(repo.get_players("德赫亚"), repo.get_coach("朗尼克"))
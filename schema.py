@@ -0,0 +1,151 @@
+from copy import copy
+from types import MappingProxyType
+from collections.abc import Sequence
+
+
+class AttrSchema(object):
+    """ 属性类(PlayersAttr/CoachAttr/ClubAttr)的预计算结构; 每个属性类只计算一次
+
+    Used:
+        players_schema = AttrSchema.of(PlayersAttr)
+        players_schema.names      # 属性名元组, 顺序与属性类定义一致
+        players_schema.validate(p, PlayersAttr.AGE)
+    """
+    __cache = dict()
+
+    def __init__(self, attr_class):
+        self.attr_class = attr_class
+        self.names = tuple(value for key, value in attr_class.__dict__.items()
+                           if isinstance(key, str) and key.isupper())
+        self.valid = frozenset(self.names)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.attr_class.__name__})"
+
+    def __contains__(self, name):
+        return name in self.valid
+
+    @classmethod
+    def of(cls, attr_class):
+        """返回属性类对应的结构; 同一个属性类共享同一个实例"""
+        schema = cls.__cache.get(attr_class)
+        if schema is None:
+            schema = cls.__cache[attr_class] = cls(attr_class)
+        return schema
+
+    def validate(self, owner, by):
+        """属性名不在属性类中时抛出ValueError"""
+        if by not in self.valid:
+            raise ValueError(
+                f"{owner.__class__.__name__} object not attribute: '{by}'"
+            )
+
+    def snapshot(self, values: dict, **names) -> tuple:
+        """构建description缓存; 返回(属性字典, 需要在返回前复制的可变属性名)"""
+        desc = {name: values.get(name) for name in self.names}
+        desc.update(names)
+        mutable = tuple(name for name, value in desc.items() if not _immutable(value))
+        return desc, mutable
+
+    def view(self, values: dict, **names) -> MappingProxyType:
+        """构建只读视图; 嵌套的字典/列表以只读方式直接引用原对象, 不做复制"""
+        desc = {name: freeze(values.get(name)) for name in self.names}
+        desc.update(names)
+        return MappingProxyType(desc)
+
+
+class SequenceView(Sequence):
+    """列表的只读视图; 直接引用原列表, 原列表的变化会反映在视图中"""
+    __slots__ = ("__items",)
+
+    def __init__(self, items: list):
+        self.__items = items
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.__items!r})"
+
+    def __getitem__(self, index):
+        return self.__items[index]
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __iter__(self):
+        return iter(self.__items)
+
+    def __contains__(self, value):
+        return value in self.__items
+
+    def __eq__(self, other):
+        if isinstance(other, SequenceView):
+            other = other.__items
+        return self.__items == other
+
+
+def freeze(value):
+    """返回值的只读形式: dict -> MappingProxyType, list -> SequenceView, 其他原样返回"""
+    if isinstance(value, dict):
+        return MappingProxyType(value)
+    if isinstance(value, list):
+        return SequenceView(value)
+    return value
+
+
+def fingerprint(values: dict, *names) -> int:
+    """返回属性内容的哈希指纹; 嵌套的字典/列表按内容参与计算. 基于hash(), 只在同一进程内稳定"""
+    return hash((names, _hashable(values)))
+
+
+def _hashable(value):
+    if isinstance(value, dict):
+        return tuple(sorted(((k, _hashable(v)) for k, v in value.items()), key=lambda item: repr(item[0])))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(_hashable(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def copy_description(cached: tuple) -> dict:
+    """根据description缓存返回新的属性字典; 只复制可变的属性值"""
+    desc, mutable = cached
+    desc = desc.copy()
+    for name in mutable:
+        desc[name] = copy(desc[name])
+    return desc
+
+
+def _immutable(value):
+    return value is None or isinstance(value, (str, int, float, bool, tuple, frozenset))
+
+
+if __name__ == '__main__':
+    import timeit
+    import character
+    from character import PlayersAttr
+    from basedata import PLAYERS_DATABASE
+
+    def scan_description(p):
+        desc = dict()
+        attributes = [value for key, value in PlayersAttr.__dict__.items()
+                      if isinstance(key, str) and key.isupper()]
+        for name in attributes:
+            desc[name] = copy(getattr(p, name))
+        return desc
+
+    schema = AttrSchema.of(PlayersAttr)
+    players = [character.Players(name, **attrs) for name, attrs in PLAYERS_DATABASE.items()]
+    number = 20
+    for label, func in (
+            ("description (scan)", lambda: [scan_description(p) for p in players]),
+            ("description (schema)", lambda: [p.description() for p in players]),
+            ("view", lambda: [p.view() for p in players]),
+            ("validate (scan)", lambda: [PlayersAttr.WORTH in PlayersAttr.__dict__.values() for p in players]),
+            ("validate (schema)", lambda: [PlayersAttr.WORTH in schema.valid for p in players]),
+    ):
+        seconds = min(timeit.repeat(func, number=number, repeat=5)) / number / len(players)
+        print(f"{label:<24}{seconds * 1e6:6.2f} us/call")
@@ -0,0 +1,221 @@
+import os
+import sys
+import mmap
+import marshal
+import struct
+from collections import OrderedDict
+from collections.abc import Mapping
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "basedata.py")
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "basedata.snap")
+
+MAGIC = b"WFSNAP"
+VERSION = 2
+TABLES = ("PLAYERS_DATABASE", "COACH_DATABASE")
+
+# magic, 格式版本, 源文件修改时间(ns), 源文件大小, 目录区长度
+_HEADER = struct.Struct("<6sHqQI")
+
+
+class SnapshotError(Exception):
+    """快照文件不存在、版本不符或与basedata.py不一致时抛出"""
+
+
+def source_stamp(source=SOURCE_PATH) -> tuple:
+    """返回basedata.py源文件的(修改时间ns, 大小); 与.pyc相同, 以此判断快照是否过期而不读取源文件"""
+    stat = os.stat(source)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def build(path=SNAPSHOT_PATH, source=SOURCE_PATH) -> str:
+    """将basedata中的PLAYERS_DATABASE/COACH_DATABASE编译为二进制快照
+
+    文件布局:
+        header: magic | version | basedata.py的修改时间(ns) | basedata.py的大小 | 目录区长度
+        目录区: marshal({表名: {记录名: (偏移, 长度)}})
+        数据区: 每条记录单独marshal后依次拼接, 偏移相对数据区起始位置
+    :param path: 快照输出路径
+    :param source: basedata.py路径, 记录其修改时间和大小用于判断快照是否过期
+    :return: 快照路径
+    """
+    import basedata
+
+    directory, chunks, offset = dict(), list(), 0
+    for table in TABLES:
+        index = dict()
+        for name, record in getattr(basedata, table).items():
+            blob = marshal.dumps(record)
+            index[name] = (offset, len(blob))
+            chunks.append(blob)
+            offset += len(blob)
+        directory[table] = index
+    directory_blob = marshal.dumps(directory)
+    header = _HEADER.pack(MAGIC, VERSION, *source_stamp(source), len(directory_blob))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(directory_blob)
+        f.writelines(chunks)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(buffer, source=SOURCE_PATH):
+    """校验快照头部并返回(目录, 数据区起始偏移)
+
+    当source为None时跳过与源文件的比对
+    """
+    if len(buffer) < _HEADER.size:
+        raise SnapshotError("snapshot file is truncated")
+    magic, version, mtime_ns, size, directory_size = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise SnapshotError("not a world_football snapshot file")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version: {version}")
+    if source is not None and os.path.exists(source) and (mtime_ns, size) != source_stamp(source):
+        raise SnapshotError("snapshot is stale; basedata.py has changed")
+    start = _HEADER.size
+    directory = marshal.loads(buffer[start:start + directory_size])
+    return directory, start + directory_size
+
+
+def load(path=SNAPSHOT_PATH, source=SOURCE_PATH) -> dict:
+    """读取快照并返回{表名: {记录名: 记录}}"""
+    try:
+        with open(path, "rb") as f:
+            buffer = f.read()
+    except FileNotFoundError:
+        raise SnapshotError(f"snapshot not found: {path}") from None
+    directory, base = read_header(buffer, source)
+    view = memoryview(buffer)
+    tables = dict()
+    for table, index in directory.items():
+        tables[table] = {name: marshal.loads(view[base + offset:base + offset + size])
+                         for name, (offset, size) in index.items()}
+    return tables
+
+
+def load_or_build(path=SNAPSHOT_PATH, source=SOURCE_PATH) -> dict:
+    """读取快照; 快照不存在或已过期时重新编译后再读取"""
+    try:
+        return load(path, source)
+    except SnapshotError:
+        build(path, source)
+        return load(path, source)
+
+
+class SnapshotTable(Mapping):
+    """ 快照中单张表的只读映射; 内存中只保留{记录名: (偏移, 长度)}索引,
+    每条记录在首次访问时才解码
+
+    Used:
+        players = open_tables(cache_size=64)["PLAYERS_DATABASE"]
+        # 与PLAYERS_DATABASE.get(name)用法一致
+        Players("德赫亚", **players.get("德赫亚"))
+
+    :param buffer: 快照文件内容(mmap或bytes)
+    :param index: 记录索引, {记录名: (偏移, 长度)}
+    :param base: 数据区起始偏移
+    :param cache_size: 已解码记录的缓存条数; None不限制, 0不缓存
+    """
+
+    def __init__(self, buffer, index: dict, base: int, cache_size=None):
+        self.__buffer = buffer
+        self.__index = index
+        self.__base = base
+        self.__cache_size = cache_size
+        self.__cache = OrderedDict()
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(records={len(self.__index)}, "
+                f"decoded={len(self.__cache)})")
+
+    def __getitem__(self, name):
+        cache = self.__cache
+        if name in cache:
+            cache.move_to_end(name)
+            return cache[name]
+        offset, size = self.__index[name]
+        start = self.__base + offset
+        record = marshal.loads(self.__buffer[start:start + size])
+        if self.__cache_size is None or self.__cache_size > 0:
+            cache[name] = record
+            if self.__cache_size is not None and len(cache) > self.__cache_size:
+                cache.popitem(last=False)
+        return record
+
+    def __contains__(self, name):
+        return name in self.__index
+
+    def __iter__(self):
+        return iter(self.__index)
+
+    def __len__(self):
+        return len(self.__index)
+
+
+def open_tables(path=SNAPSHOT_PATH, source=SOURCE_PATH, cache_size=None) -> dict:
+    """以mmap方式打开快照并返回{表名: SnapshotTable}; 快照不存在或已过期时重新编译
+
+    :param cache_size: 每张表已解码记录的缓存条数; None不限制, 0不缓存
+    """
+    try:
+        buffer = _open_buffer(path)
+        directory, base = read_header(buffer, source)
+    except SnapshotError:
+        build(path, source)
+        buffer = _open_buffer(path)
+        directory, base = read_header(buffer, source)
+    return {table: SnapshotTable(buffer, index, base, cache_size)
+            for table, index in directory.items()}
+
+
+def _open_buffer(path):
+    try:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        raise SnapshotError(f"snapshot not found or empty: {path}") from None
+
+
+_loaded = dict()
+
+
+def __getattr__(name):
+    """延迟加载: from snapshot import PLAYERS_DATABASE 时只打开快照并读取索引,
+    记录在首次访问时才解码"""
+    if name not in TABLES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if not _loaded:
+        _loaded.update(open_tables())
+    return _loaded[name]
+
+
+if __name__ == '__main__':
+    import subprocess
+    import timeit
+
+    build()
+    print(f"snapshot written: {SNAPSHOT_PATH} ({os.path.getsize(SNAPSHOT_PATH)} bytes)")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    # 带pyc的用例需要先写入字节码缓存, 否则snapshot.py每次启动都要重新编译
+    import py_compile
+    for module in (SOURCE_PATH, os.path.join(here, "snapshot.py")):
+        py_compile.compile(module)
+    # 禁用字节码缓存以模拟冷启动, 同时对比有.pyc缓存时的情况
+    cases = {
+        "basedata (no pyc)": ([sys.executable, "-B", "-c", "from basedata import PLAYERS_DATABASE"], True),
+        "basedata (pyc)": ([sys.executable, "-c", "from basedata import PLAYERS_DATABASE"], False),
+        "snapshot (pyc)": ([sys.executable, "-c", "from snapshot import PLAYERS_DATABASE"], False),
+        "interpreter only": ([sys.executable, "-B", "-c", "pass"], False),
+    }
+    for label, (command, no_cache) in cases.items():
+        env = dict(os.environ)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        if no_cache:
+            env["PYTHONDONTWRITEBYTECODE"] = "1"
+            env["PYTHONPYCACHEPREFIX"] = os.path.join(here, ".bench_pycache")
+        seconds = min(timeit.repeat(lambda: subprocess.run(command, cwd=here, env=env, check=True),
+                                    repeat=5, number=3)) / 3
+        print(f"{label:<20}{seconds * 1000:8.2f} ms")
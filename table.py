@@ -0,0 +1,190 @@
+import numpy as np
+import character
+import parsers
+import vocab
+from character import PlayersAttr
+
+
+class PlayerTable(object):
+    """ 列式球员表; 每个属性保存为一列连续的numpy数组, 数值属性在构建时解析一次
+
+    数值列: age(int16, 缺失为-1), height(float32, cm, 缺失为nan),
+           number(int16, 缺失为-1), worth(float64, 货币单位, 缺失为nan),
+           birthday(datetime64[D], 缺失或只有年份时为NaT)
+    编码列: team / location / nationality / preferred_foot (int32编码, 对应vocabularies中的Vocabulary;
+           默认使用vocab.shared, 不同批次构建的表编码一致)
+
+    Used:
+        table = PlayerTable.from_database(PLAYERS_DATABASE)
+        # 曼联所有身价超过5000万的球员
+        mask = table.isin(PlayersAttr.TEAM, ["曼彻斯特联"]) & (table.worth > 5e7)
+        table.names(mask)
+        # 各俱乐部球员身价总和
+        table.group_sum(PlayersAttr.TEAM, table.worth)
+        # 第N轮比赛日所有球员的周岁
+        table.age_on("2023-05-28")
+    """
+    CODED = (PlayersAttr.TEAM, PlayersAttr.LOCATION, PlayersAttr.NATIONALITY, PlayersAttr.PREFERRED_FOOT)
+
+    def __init__(self, ch_name, en_name, age, height, number, worth, codes: dict, vocabularies: dict,
+                 birthday=None):
+        self.ch_name = np.asarray(ch_name, dtype=object)
+        self.en_name = np.asarray(en_name, dtype=object)
+        self.age = np.asarray(age, dtype=np.int16)
+        self.height = np.asarray(height, dtype=np.float32)
+        self.number = np.asarray(number, dtype=np.int16)
+        self.worth = np.asarray(worth, dtype=np.float64)
+        self.birthday = (np.full(len(self.ch_name), np.datetime64("NaT"), dtype="datetime64[D]")
+                         if birthday is None else np.asarray(birthday, dtype="datetime64[D]"))
+        self.codes = {name: np.asarray(column, dtype=np.int32) for name, column in codes.items()}
+        self.vocabularies = vocabularies
+        self.currency = set()
+        self._ages = dict()
+
+    def __len__(self):
+        return len(self.ch_name)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(rows={len(self)})"
+
+    @classmethod
+    def from_records(cls, records, vocabularies=None):
+        """根据(中文名, 属性字典)序列构建球员表
+
+        :param vocabularies: {编码列: vocab.Vocabulary}; 为None时使用进程内共享的编码字典
+        """
+        if vocabularies is None:
+            vocabularies = {name: vocab.shared(name) for name in cls.CODED}
+        ch_name, en_name, age, height, number, worth = list(), list(), list(), list(), list(), list()
+        birthday = list()
+        codes = {name: list() for name in cls.CODED}
+        currencies = set()
+        for name, attrs in records:
+            amount, currency = parsers.parse_worth(attrs.get(PlayersAttr.WORTH))
+            currencies.add(currency)
+            ch_name.append(name)
+            en_name.append(attrs.get(PlayersAttr.EN_NAME, ""))
+            age.append(_or_default(parsers.parse_age(attrs.get(PlayersAttr.AGE)), -1))
+            height.append(_or_default(parsers.parse_height(attrs.get(PlayersAttr.HEIGHT)), np.nan))
+            number.append(_or_default(parsers.parse_number(attrs.get(PlayersAttr.NUMBER)), -1))
+            worth.append(_or_default(amount, np.nan))
+            birthday.append(parsers.parse_date(attrs.get(PlayersAttr.BIRTHDAY)))
+            for column in cls.CODED:
+                codes[column].append(vocabularies[column].encode(attrs.get(column, "")))
+        table = cls(ch_name, en_name, age, height, number, worth, codes, vocabularies,
+                    np.array(birthday, dtype="datetime64[D]"))
+        table.currency = {value for value in currencies if value}
+        return table
+
+    @classmethod
+    def from_database(cls, database):
+        """根据PLAYERS_DATABASE结构的映射构建球员表"""
+        return cls.from_records(database.items())
+
+    @classmethod
+    def from_players(cls, players):
+        """根据character.Players列表构建球员表"""
+        return cls.from_records((p.ch_name, p.description()) for p in players)
+
+    def column(self, name):
+        """返回属性对应的列; 编码列返回编码数组"""
+        if name in self.codes:
+            return self.codes[name]
+        return getattr(self, name)
+
+    def decode(self, name, codes):
+        """将编码列中的编码还原为字符串列表"""
+        vocabulary = self.vocabularies[name]
+        return [vocabulary.decode(code) for code in codes]
+
+    def isin(self, name, values):
+        """返回编码列取值属于values的布尔掩码"""
+        vocabulary = self.vocabularies[name]
+        wanted = [vocabulary.code(value) for value in values]
+        return np.isin(self.codes[name], [code for code in wanted if code >= 0])
+
+    def names(self, mask=None):
+        """返回掩码选中的球员中文名"""
+        return list(self.ch_name if mask is None else self.ch_name[mask])
+
+    def take(self, mask):
+        """返回掩码(或下标数组)选中的行组成的新表, 共享编码字典"""
+        table = self.__class__(
+            self.ch_name[mask], self.en_name[mask], self.age[mask], self.height[mask],
+            self.number[mask], self.worth[mask],
+            {name: column[mask] for name, column in self.codes.items()}, self.vocabularies,
+            self.birthday[mask],
+        )
+        table.currency = self.currency
+        return table
+
+    def age_on(self, as_of=None):
+        """返回所有球员在as_of当天的周岁(int16数组, 出生日期缺失为-1); 结果按日期缓存, 返回只读数组
+
+        :param as_of: datetime.date/datetime或"YYYY-MM-DD"字符串, 默认今天
+        """
+        as_of = character.as_of_date(as_of)
+        ages = self._ages.get(as_of)
+        if ages is None:
+            ages = self._ages[as_of] = ages_on(self.birthday, as_of)
+            ages.flags.writeable = False
+        return ages
+
+    def group_sum(self, name, values) -> dict:
+        """按编码列分组对values求和(忽略nan); 返回{分组值: 和}, 只包含表中出现的分组值"""
+        codes, inverse = np.unique(self.codes[name], return_inverse=True)
+        sums = np.bincount(inverse, weights=np.nan_to_num(values), minlength=len(codes))
+        return dict(zip(self.decode(name, codes), map(float, sums)))
+
+    def group_count(self, name) -> dict:
+        """按编码列分组计数; 返回{分组值: 人数}, 只包含表中出现的分组值"""
+        codes, counts = np.unique(self.codes[name], return_counts=True)
+        return dict(zip(self.decode(name, codes), map(int, counts)))
+
+
+def ages_on(birthdays, as_of):
+    """向量化计算周岁; birthdays为datetime64[D]数组, NaT对应-1
+
+    :param as_of: datetime.date或datetime64
+    """
+    birthdays = np.asarray(birthdays, dtype="datetime64[D]")
+    as_of = np.datetime64(as_of, "D")
+    years = birthdays.astype("datetime64[Y]")
+    months = birthdays.astype("datetime64[M]")
+    # 按(月, 日)比较, 生日未到时减一岁; 不依赖一年中的天数, 闰年同样准确
+    month = (months - years).astype(np.int64)
+    day = (birthdays - months).astype(np.int64)
+    as_of_years = as_of.astype("datetime64[Y]")
+    as_of_months = as_of.astype("datetime64[M]")
+    as_of_month = (as_of_months - as_of_years).astype(np.int64)
+    as_of_day = (as_of - as_of_months).astype(np.int64)
+    ages = (as_of_years - years).astype(np.int64)
+    ages -= (month > as_of_month) | ((month == as_of_month) & (day > as_of_day))
+    return np.where(np.isnat(birthdays), -1, ages).astype(np.int16)
+
+
+def _or_default(value, default):
+    return default if value is None else value
+
+
+if __name__ == '__main__':
+    from basedata import PLAYERS_DATABASE
+
+    table = PlayerTable.from_database(PLAYERS_DATABASE)
+    print(table, table.currency)
+    mask = table.isin(PlayersAttr.TEAM, ["曼彻斯特联"]) & (table.worth > 5e7)
+    print(table.names(mask))
+    print("平均身高:", float(np.nanmean(table.height)))
+    print(table.group_sum(PlayersAttr.TEAM, table.worth))
+    players = [character.Players(name, **PLAYERS_DATABASE.get(name)) for name in list(PLAYERS_DATABASE)[:25]]
+    print(PlayerTable.from_players(players).group_count(PlayersAttr.LOCATION))
+
+    import timeit
+    season = [np.datetime64("2022-08-06") + np.timedelta64(7 * week, "D") for week in range(38)]
+    players = [character.Players(name, **attrs) for name, attrs in PLAYERS_DATABASE.items()]
+    for label, func in (
+            ("Players.age_on", lambda: [[p.age_on(day.item()) for p in players] for day in season]),
+            ("PlayerTable.age_on", lambda: [table.age_on(day.item()) for day in season]),
+    ):
+        seconds = min(timeit.repeat(func, number=5, repeat=3)) / 5
+        print(f"{label:<20}{seconds * 1000:8.2f} ms per season ({len(season)} matchdays, {len(table)} players)")
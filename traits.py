@@ -0,0 +1,181 @@
+import vocab
+from character import PlayersAttr
+
+
+class AbilityAttr(object):
+    """球员能力分布(ability)所包含的类别;
+    用于构建或查询特点索引时引用"""
+    STRENGTHS = "优势"
+    WEAKNESSES = "弱点"
+    STYLES = "风格"
+
+
+CATEGORIES = (AbilityAttr.STRENGTHS, AbilityAttr.WEAKNESSES, AbilityAttr.STYLES)
+
+
+def split_traits(text) -> list:
+    """拆分斜杠分隔的特点字符串; "远射/带球/" -> ["远射", "带球"]"""
+    return [trait.strip() for trait in (text or "").split("/") if trait.strip()]
+
+
+class TraitIndex(object):
+    """ 球员特点(优势/弱点/风格)位图索引
+
+    特点字符串只在构建时拆分一次并编码到全局特点词表(vocab.shared("trait")),
+    每个球员在每个类别下的特点保存为一个整数位掩码; 同时为每个(类别, 特点)维护一个球员位集,
+    查询时只需对位集做与/或/非运算.
+
+    Used:
+        index = TraitIndex.from_database(PLAYERS_DATABASE)
+        # 擅长远射且弱点不包括防守贡献的球员
+        index.query(all_of={"优势": ["远射"]}, none_of={"弱点": ["防守贡献"]})
+        # 擅长头球或争高空球的球员
+        index.query(any_of={"优势": ["头球", "争高空球"]})
+        index.has("博格巴", AbilityAttr.STRENGTHS, "远射")
+    """
+
+    def __init__(self):
+        self.vocabulary = vocab.shared("trait")
+        self.names = list()
+        self.__rows = dict()
+        self.__masks = {category: list() for category in CATEGORIES}
+        self.__postings = {category: dict() for category in CATEGORIES}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.__rows
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(players={len(self)}, traits={len(self.vocabulary)})"
+
+    @classmethod
+    def from_database(cls, database):
+        """根据PLAYERS_DATABASE结构的映射构建索引"""
+        index = cls()
+        for name, attrs in database.items():
+            index.add(name, attrs.get(PlayersAttr.ABILITY))
+        return index
+
+    @classmethod
+    def from_players(cls, players):
+        """根据character.Players列表构建索引"""
+        index = cls()
+        for p in players:
+            index.add(p.ch_name, p.ability)
+        return index
+
+    def add(self, name: str, ability: dict):
+        """添加一个球员; 同名球员重复添加时覆盖旧的特点"""
+        ability = ability or dict()
+        row = self.__rows.get(name)
+        if row is None:
+            row = self.__rows[name] = len(self.names)
+            self.names.append(name)
+            for category in CATEGORIES:
+                self.__masks[category].append(0)
+        bit = 1 << row
+        for category in CATEGORIES:
+            postings = self.__postings[category]
+            old = self.__masks[category][row]
+            while old:
+                low = old & -old
+                postings[low.bit_length() - 1] &= ~bit
+                old ^= low
+            mask = 0
+            for trait in split_traits(ability.get(category)):
+                code = self.vocabulary.encode(trait)
+                mask |= 1 << code
+                postings[code] = postings.get(code, 0) | bit
+            self.__masks[category][row] = mask
+
+    def traits(self, name: str) -> dict:
+        """返回球员各类别下的特点列表"""
+        row = self.__rows[name]
+        return {category: self._decode_traits(self.__masks[category][row]) for category in CATEGORIES}
+
+    def has(self, name: str, category: str, trait: str) -> bool:
+        """判断球员在某类别下是否具有某特点"""
+        code = self.vocabulary.code(trait)
+        if code < 0 or name not in self.__rows:
+            return False
+        return bool(self.__masks[category][self.__rows[name]] >> code & 1)
+
+    def bitset(self, category: str, traits, require_all=True) -> int:
+        """返回具有traits(全部或任一)的球员位集"""
+        if category not in self.__postings:
+            raise ValueError(f"{self.__class__.__name__} unknown category: '{category}'")
+        postings = self.__postings[category]
+        result = self._all() if require_all else 0
+        for trait in traits:
+            bits = postings.get(self.vocabulary.code(trait), 0)
+            result = result & bits if require_all else result | bits
+        return result
+
+    def query(self, all_of=None, any_of=None, none_of=None) -> list:
+        """按特点组合查询球员中文名; 三个条件取交集, 参数结构均为{类别: [特点, ...]}
+
+        :param all_of: 必须具有的全部特点
+        :param any_of: 至少具有其中一个特点(跨类别同样取并集)
+        :param none_of: 不能具有其中任何一个特点
+        :return: [球员中文名, ...], 按添加顺序
+        """
+        result = self._all()
+        for category, traits in (all_of or dict()).items():
+            result &= self.bitset(category, traits, require_all=True)
+        if any_of:
+            result &= self._union(any_of)
+        if none_of:
+            result &= ~self._union(none_of)
+        return self._decode_rows(result)
+
+    def count(self, all_of=None, any_of=None, none_of=None) -> int:
+        """返回符合条件的球员数量"""
+        return len(self.query(all_of, any_of, none_of))
+
+    def _all(self):
+        return (1 << len(self.names)) - 1
+
+    def _union(self, conditions):
+        result = 0
+        for category, traits in conditions.items():
+            result |= self.bitset(category, traits, require_all=False)
+        return result
+
+    def _decode_rows(self, bits):
+        names = list()
+        while bits:
+            low = bits & -bits
+            names.append(self.names[low.bit_length() - 1])
+            bits ^= low
+        return names
+
+    def _decode_traits(self, mask):
+        traits = list()
+        while mask:
+            low = mask & -mask
+            traits.append(self.vocabulary.decode(low.bit_length() - 1))
+            mask ^= low
+        return traits
+
+
+if __name__ == '__main__':
+    import timeit
+    from basedata import PLAYERS_DATABASE
+
+    index = TraitIndex.from_database(PLAYERS_DATABASE)
+    print(index)
+    print(index.query(all_of={"优势": ["远射"]}, none_of={"弱点": ["防守贡献"]}))
+    print(index.traits("克里斯蒂亚诺·罗纳尔多"))
+
+    def scan():
+        return [name for name, attrs in PLAYERS_DATABASE.items()
+                if "远射" in split_traits(attrs["ability"].get("优势"))
+                and "防守贡献" not in split_traits(attrs["ability"].get("弱点"))]
+
+    assert scan() == index.query(all_of={"优势": ["远射"]}, none_of={"弱点": ["防守贡献"]})
+    print("split scan: {:.1f} us".format(min(timeit.repeat(scan, number=200, repeat=5)) / 200 * 1e6))
+    print("bitset query: {:.1f} us".format(min(timeit.repeat(
+        lambda: index.query(all_of={"优势": ["远射"]}, none_of={"弱点": ["防守贡献"]}),
+        number=200, repeat=5)) / 200 * 1e6))
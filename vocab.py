@@ -0,0 +1,130 @@
+import sys
+
+# 取值大量重复的属性; 构建Players/Coach/Club时这些字符串会被驻留(sys.intern)
+INTERNED_FIELDS = frozenset((
+    "team", "location", "nationality", "preferred_foot", "height", "number", "worth", "age",
+    "city", "league_matches", "football_court",
+))
+# 嵌套字典属性; 键和值都会被驻留
+NESTED_FIELDS = frozenset(("honour", "ability"))
+
+
+class Vocabulary(object):
+    """字符串字典编码; 相同的字符串映射为同一个整数编码, 保存的字符串均已驻留"""
+
+    def __init__(self, values=()):
+        self.__codes = dict()
+        self.__values = list()
+        for value in values:
+            self.encode(value)
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __contains__(self, value):
+        return value in self.__codes
+
+    def __iter__(self):
+        return iter(self.__values)
+
+    def encode(self, value) -> int:
+        """返回value的编码; 未出现过的值分配新编码"""
+        code = self.__codes.get(value)
+        if code is None:
+            value = intern_value(value)
+            code = self.__codes[value] = len(self.__values)
+            self.__values.append(value)
+        return code
+
+    def code(self, value) -> int:
+        """返回value的编码; 未出现过的值返回-1"""
+        return self.__codes.get(value, -1)
+
+    def decode(self, code: int):
+        """返回编码对应的字符串"""
+        return self.__values[code]
+
+
+_shared = dict()
+
+
+def shared(name: str) -> Vocabulary:
+    """返回属性name在进程内共享的Vocabulary; 不同批次构建的列式数据编码一致"""
+    vocabulary = _shared.get(name)
+    if vocabulary is None:
+        vocabulary = _shared.setdefault(name, Vocabulary())
+    return vocabulary
+
+
+def intern_value(value):
+    """驻留字符串; 非字符串原样返回"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_dict(values: dict) -> dict:
+    """驻留字典的键和字符串值; 若所有键值均已是驻留对象则直接返回原字典, 避免重复分配"""
+    interned = {intern_value(k): intern_value(v) for k, v in values.items()}
+    for (k, v), (ik, iv) in zip(values.items(), interned.items()):
+        if k is not ik or v is not iv:
+            return interned
+    return values
+
+
+def intern_field(key: str, value):
+    """按属性名驻留单个属性值"""
+    if key in NESTED_FIELDS and isinstance(value, dict):
+        return intern_dict(value)
+    if key in INTERNED_FIELDS:
+        return intern_value(value)
+    return value
+
+
+def intern_attrs(attrs: dict) -> dict:
+    """返回属性字典的副本, 其中重复度高的字符串及嵌套字典均被驻留"""
+    return {intern_value(key): intern_field(key, value) for key, value in attrs.items()}
+
+
+def deep_sizeof(objects) -> int:
+    """返回objects可达的所有对象占用的字节数; 被多次引用的对象只计算一次"""
+    seen, total, stack = set(), 0, list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+    return total
+
+
+def memory_report(database, replicas=100) -> dict:
+    """对比驻留前后每个球员占用的字节数
+
+    模拟从外部数据源逐条解码得到的记录(每条记录的字符串都是独立对象):
+        before: 未驻留时Players保存的属性字典(kwargs.copy())
+        after: 使用intern_attrs后的属性字典
+    :return: {"before": 字节/球员, "after": 字节/球员}
+    """
+    import json
+
+    payload = [json.dumps(attrs, ensure_ascii=False) for attrs in database.values()]
+    before = [json.loads(text).copy() for _ in range(replicas) for text in payload]
+    after = [intern_attrs(json.loads(text)) for _ in range(replicas) for text in payload]
+    return {
+        "before": deep_sizeof(before) / len(before),
+        "after": deep_sizeof(after) / len(after),
+    }
+
+
+if __name__ == '__main__':
+    from basedata import PLAYERS_DATABASE
+
+    report = memory_report(PLAYERS_DATABASE)
+    print(f"bytes per player: before={report['before']:.0f} after={report['after']:.0f} "
+          f"({1 - report['after'] / report['before']:.0%} saved)")